@@ -119,9 +119,10 @@ class DeviceArray(numpy.lib.mixins.NDArrayOperatorsMixin):
     # Detect if we need to force an explicit conversion. This happens when
     # we were requested to pretend that the array is in a specific dtype,
     # even if that is not representable on the device. You guessed it:
-    # this is to support bools.
+    # this is to support bools. Numpy elides the copy if the dtypes turn out
+    # to be equivalent.
     if self._override_dtype is not None and self._override_dtype != raw_dtype:
-      host_array = host_array.astype(self._override_dtype)
+      host_array = host_array.astype(self._override_dtype, copy=False)
     return mapped_memory, host_array
 
   def _get_raw_dtype(self):
@@ -161,7 +162,11 @@ class DeviceArray(numpy.lib.mixins.NDArrayOperatorsMixin):
     # Since this is used for making deep copies and pickling, we map
     # separately from any interactive state. We just reduce to the actual
     # host ndarray, which supports the necessary serialization protocols.
-    _, host_array = self._map_to_host()
+    # Arrays that are already host accessible (e.g. results that have been
+    # read) reuse their existing mapping rather than mapping the buffer again.
+    host_array = self._host_array
+    if host_array is None:
+      _, host_array = self._map_to_host()
     return _restore_reduced_array, (host_array,)
 
 
@@ -244,8 +249,21 @@ _DTYPE_TO_HAL_ELEMENT_TYPE = (
     (np.bool_, HalElementType.BOOL_8),
 )
 
+# Hashed view of the above, keyed by the dtype's type number, so that the
+# common case of mapping an actual np.dtype does not need to do a sequence of
+# dtype equality comparisons. Dtypes that are equivalent but have a different
+# type number (i.e. 'q' vs 'l' on some platforms) fall back to the list.
+_DTYPE_NUM_TO_HAL_ELEMENT_TYPE = {
+    np.dtype(match_dtype).num: element_type
+    for match_dtype, element_type in _DTYPE_TO_HAL_ELEMENT_TYPE
+}
+
 
 def map_dtype_to_element_type(dtype) -> Optional[HalElementType]:
+  if isinstance(dtype, np.dtype):
+    element_type = _DTYPE_NUM_TO_HAL_ELEMENT_TYPE.get(dtype.num)
+    if element_type is not None:
+      return element_type
   for match_dtype, element_type in _DTYPE_TO_HAL_ELEMENT_TYPE:
     if match_dtype == dtype:
       return element_type
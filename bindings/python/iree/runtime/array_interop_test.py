@@ -117,6 +117,16 @@ class DeviceHalTest(unittest.TestCase):
     self.assertIsNot(orig_ary, copy_ary)
     np.testing.assert_array_equal(orig_ary, copy_ary)
 
+  def testDeepcopyHostAccessible(self):
+    init_ary = np.zeros([3, 4], dtype=np.int32) + 2
+    orig_ary = iree.runtime.asdevicearray(self.device,
+                                          init_ary,
+                                          implicit_host_transfer=True)
+    host_ary = orig_ary.to_host()
+    copy_ary = copy.deepcopy(orig_ary)
+    self.assertIsNot(host_ary, copy_ary)
+    np.testing.assert_array_equal(host_ary, copy_ary)
+
   def testAsType(self):
     init_ary = np.zeros([3, 4], dtype=np.int32) + 2
     orig_ary = iree.runtime.asdevicearray(self.device,
@@ -144,6 +154,17 @@ class DeviceHalTest(unittest.TestCase):
     self.assertEqual(repr(ary), "<IREE DeviceArray: shape=[3, 4], dtype=bool>")
     np.testing.assert_array_equal(ary.to_host(), init_ary)
 
+  def testMapDtypeToElementType(self):
+    map_dtype = iree.runtime.array_interop.map_dtype_to_element_type
+    HalElementType = iree.runtime.HalElementType
+    self.assertEqual(HalElementType.FLOAT_32, map_dtype(np.dtype(np.float32)))
+    self.assertEqual(HalElementType.FLOAT_32, map_dtype(np.float32))
+    self.assertEqual(HalElementType.SINT_64, map_dtype(np.dtype("q")))
+    self.assertEqual(HalElementType.SINT_64, map_dtype(np.dtype("l")))
+    self.assertEqual(HalElementType.BOOL_8, map_dtype(np.dtype(np.bool_)))
+    self.assertEqual(HalElementType.UINT_8, map_dtype(np.dtype(np.uint8)))
+    self.assertIsNone(map_dtype(np.dtype(np.complex64)))
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -7,11 +7,20 @@
 
 from typing import Dict, Optional
 
+import collections
 import json
 import logging
+import threading
 
 import numpy as np
 
+# Reflection metadata is parsed for every bound function, so prefer orjson
+# when available. Its JSONDecodeError subclasses json.JSONDecodeError.
+try:
+  from orjson import loads as _json_loads
+except ModuleNotFoundError:
+  _json_loads = json.loads
+
 from .binding import (
     _invoke_statics,
     ArgumentPacker,
@@ -49,12 +58,21 @@ class Invocation:
 
   def __init__(self, device: HalDevice):
     self.device = device
+    self.reset()
+
+  def reset(self):
     # Captured during arg/ret processing to emit better error messages.
     self.current_arg = None
     self.current_desc = None
     self.current_return_list = None
     self.current_return_index = 0
 
+  def set_current_return(self, vm_list, vm_index: int, desc):
+    # Only called on error paths, just before raising.
+    self.current_return_list = vm_list
+    self.current_return_index = vm_index
+    self.current_desc = desc
+
   def summarize_arg_error(self) -> str:
     if self.current_arg is None:
       return ""
@@ -85,8 +103,10 @@ class FunctionInvoker:
       "_arg_descs",
       "_arg_packer",
       "_ret_descs",
+      "_ret_plans",
       "_has_inlined_results",
       "_tracer",
+      "_per_thread",
   ]
 
   def __init__(self, vm_context: VmContext, device: HalDevice,
@@ -99,9 +119,14 @@ class FunctionInvoker:
     self._device = device
     self._vm_function = vm_function
     self._tracer = tracer
+    # The return list and the Invocation (which only carries error reporting
+    # state) are reused across calls rather than allocated per call.
+    # Invocation releases the GIL, so each thread gets its own.
+    self._per_thread = threading.local()
     self._abi_dict = None
     self._arg_descs = None
     self._ret_descs = None
+    self._ret_plans = None
     self._has_inlined_results = False
     self._parse_abi_dict(vm_function)
     self._arg_packer = ArgumentPacker(_invoke_statics, self._arg_descs)
@@ -111,43 +136,69 @@ class FunctionInvoker:
     return self._vm_function
 
   def __call__(self, *args, **kwargs):
+    if self._tracer:
+      return self._call_traced(args, kwargs)
     invoke_context = InvokeContext(self._device)
     arg_list = self._arg_packer.pack(invoke_context, args, kwargs)
+    ret_list = getattr(self._per_thread, "ret_list", None)
+    if ret_list is None:
+      ret_list = self._create_ret_list()
+    try:
+      self._invoke(arg_list, ret_list)
+      return self._unpack_results(ret_list)
+    finally:
+      # Release the results so that they are not kept alive by the cache.
+      ret_list.clear()
 
-    call_trace = None  # type: Optional[tracing.CallTrace]
-    if self._tracer:
-      call_trace = self._tracer.start_call(self._vm_function)
+  def _call_traced(self, args, kwargs):
+    # Equivalent to __call__ but records the call with the tracer. Kept
+    # separate so that untraced calls do not pay for the bookkeeping.
+    invoke_context = InvokeContext(self._device)
+    arg_list = self._arg_packer.pack(invoke_context, args, kwargs)
+    ret_list = getattr(self._per_thread, "ret_list", None)
+    if ret_list is None:
+      ret_list = self._create_ret_list()
+    call_trace = self._tracer.start_call(self._vm_function)
     try:
-      # Initialize the capacity to our total number of args, since we should
-      # be below that when doing a flat invocation. May want to be more
-      # conservative here when considering nesting.
-      inv = Invocation(self._device)
-      ret_descs = self._ret_descs
-
-      ret_list = VmVariantList(len(ret_descs) if ret_descs is not None else 1)
-      if call_trace:
-        call_trace.add_vm_list(arg_list, "args")
+      call_trace.add_vm_list(arg_list, "args")
       self._invoke(arg_list, ret_list)
-      if call_trace:
-        call_trace.add_vm_list(ret_list, "results")
-
-      # Un-inline the results to align with reflection, as needed.
-      reflection_aligned_ret_list = ret_list
-      if self._has_inlined_results:
-        reflection_aligned_ret_list = VmVariantList(1)
-        reflection_aligned_ret_list.push_list(ret_list)
-      returns = _extract_vm_sequence_to_python(inv, reflection_aligned_ret_list,
-                                               ret_descs)
-      return_arity = len(returns)
-      if return_arity == 1:
-        return returns[0]
-      elif return_arity == 0:
-        return None
-      else:
-        return tuple(returns)
+      call_trace.add_vm_list(ret_list, "results")
+      return self._unpack_results(ret_list)
     finally:
-      if call_trace:
-        call_trace.end_call()
+      ret_list.clear()
+      call_trace.end_call()
+
+  def _create_ret_list(self) -> VmVariantList:
+    # Initialize the capacity to our total number of args, since we should
+    # be below that when doing a flat invocation. May want to be more
+    # conservative here when considering nesting.
+    ret_descs = self._ret_descs
+    ret_list = VmVariantList(len(ret_descs) if ret_descs is not None else 1)
+    self._per_thread.ret_list = ret_list
+    return ret_list
+
+  def _unpack_results(self, ret_list: VmVariantList):
+    inv = getattr(self._per_thread, "inv", None)
+    if inv is None:
+      inv = self._per_thread.inv = Invocation(self._device)
+    inv.reset()
+    # Inlined results are the items of the single reflected result, so
+    # they are decoded directly from the returned list.
+    if self._has_inlined_results:
+      return _extract_inlined_vm_sequence_to_python(inv, ret_list,
+                                                    self._ret_plans[0])
+    ret_plans = self._ret_plans
+    if ret_plans is None:
+      returns = _extract_dynamic_vm_sequence_to_python(inv, ret_list)
+    else:
+      returns = _extract_vm_sequence_to_python(inv, ret_list, ret_plans)
+    return_arity = len(returns)
+    if return_arity == 1:
+      return returns[0]
+    elif return_arity == 0:
+      return None
+    else:
+      return tuple(returns)
 
   # Break out invoke so it shows up in profiles.
   def _invoke(self, arg_list, ret_list):
@@ -164,7 +215,7 @@ class FunctionInvoker:
           vm_function)
       return
     try:
-      self._abi_dict = json.loads(abi_json)
+      self._abi_dict = _json_loads(abi_json)
     except json.JSONDecodeError as e:
       raise RuntimeError(
           f"Reflection metadata is not valid JSON: {abi_json}") from e
@@ -178,6 +229,14 @@ class FunctionInvoker:
         self._ret_descs, list):
       raise RuntimeError(
           f"Malformed function reflection metadata structure: {reflection}")
+    # Resolve the return descriptors into conversion plans once so that
+    # invocations do not need to re-interpret the descriptors. Arguments do
+    # not need this: the ArgumentPacker resolves them natively at bind time.
+    try:
+      self._ret_plans = [_build_return_plan(desc) for desc in self._ret_descs]
+    except (IndexError, TypeError, ValueError) as e:
+      raise RuntimeError(
+          f"Malformed function reflection metadata: {reflection}") from e
 
     # Detect whether the results are a slist/stuple/sdict, which indicates
     # that they are inlined with the function's results.
@@ -194,76 +253,91 @@ class FunctionInvoker:
 #   inv: Invocation
 #   vm_list: VmVariantList to read from
 #   vm_index: Index in the vm_list to extract
-#   desc: The ABI descriptor list (or None if in dynamic mode)
+#   plan: The _ReturnPlan resolved from the ABI descriptor
 # Return the corresponding Python object.
 
+# Conversion plan for a single return value, resolved once from its ABI
+# descriptor by _build_return_plan:
+#   converter: The VM to Python converter to dispatch to.
+#   desc: The original ABI descriptor (for error reporting).
+#   dtype: The numpy dtype of an ndarray (or None).
+#   keys: The tuple of item keys of an sdict (or None).
+#   sub_plans: Plans for the items of a compound type (or None).
+_ReturnPlan = collections.namedtuple(
+    "_ReturnPlan", ["converter", "desc", "dtype", "keys", "sub_plans"])
+
 
 def _vm_to_ndarray(inv: Invocation, vm_list: VmVariantList, vm_index: int,
-                   desc):
+                   plan: _ReturnPlan):
   # The descriptor for an ndarray is like:
   #   ["ndarray", "<dtype>", <rank>, <dim>...]
   #   ex: ['ndarray', 'i32', 1, 25948]
   buffer_view = vm_list.get_as_buffer_view(vm_index)
-  dtype_str = desc[1]
-  try:
-    dtype = ABI_TYPE_TO_DTYPE[dtype_str]
-  except KeyError:
-    _raise_return_error(inv, f"unrecognized dtype '{dtype_str}'")
   x = DeviceArray(inv.device,
                   buffer_view,
                   implicit_host_transfer=True,
-                  override_dtype=dtype)
+                  override_dtype=plan.dtype)
   return x
 
 
-def _vm_to_sdict(inv: Invocation, vm_list: VmVariantList, vm_index: int, desc):
+def _vm_to_sdict(inv: Invocation, vm_list: VmVariantList, vm_index: int,
+                 plan: _ReturnPlan):
   # The descriptor for an sdict is like:
   #   ['sdict', ['key1', value1], ...]
   sub_vm_list = vm_list.get_as_list(vm_index)
-  item_keys = []
-  item_descs = []
-  for k, d in desc[1:]:
-    item_keys.append(k)
-    item_descs.append(d)
-  py_items = _extract_vm_sequence_to_python(inv, sub_vm_list, item_descs)
-  return dict(zip(item_keys, py_items))
+  py_items = _extract_vm_sequence_to_python(inv, sub_vm_list, plan.sub_plans)
+  return dict(zip(plan.keys, py_items))
 
 
-def _vm_to_slist(inv: Invocation, vm_list: VmVariantList, vm_index: int, desc):
+def _vm_to_slist(inv: Invocation, vm_list: VmVariantList, vm_index: int,
+                 plan: _ReturnPlan):
   # The descriptor for an slist is like:
   #   ['slist, item1, ...]
   sub_vm_list = vm_list.get_as_list(vm_index)
-  item_descs = desc[1:]
-  py_items = _extract_vm_sequence_to_python(inv, sub_vm_list, item_descs)
+  py_items = _extract_vm_sequence_to_python(inv, sub_vm_list, plan.sub_plans)
   return py_items
 
 
-def _vm_to_stuple(inv: Invocation, vm_list: VmVariantList, vm_index: int, desc):
-  return tuple(_vm_to_slist(inv, vm_list, vm_index, desc))
+def _vm_to_stuple(inv: Invocation, vm_list: VmVariantList, vm_index: int,
+                  plan: _ReturnPlan):
+  return tuple(_vm_to_slist(inv, vm_list, vm_index, plan))
 
 
 def _vm_to_scalar(type_bound: type):
 
-  def convert(inv: Invocation, vm_list: VmVariantList, vm_index: int, desc):
+  def convert(inv: Invocation, vm_list: VmVariantList, vm_index: int,
+              plan: _ReturnPlan):
     value = vm_list.get_variant(vm_index)
     if not isinstance(value, type_bound):
-      raise ReturnError(
-          f"expected an {type_bound} value but got {value.__class__}")
+      _raise_return_error(
+          inv, f"expected an {type_bound} value but got {value.__class__}")
     return value
 
   return convert
 
 
-def _vm_to_pylist(inv: Invocation, vm_list: VmVariantList, vm_index: int, desc):
+def _vm_to_pylist(inv: Invocation, vm_list: VmVariantList, vm_index: int,
+                  plan: _ReturnPlan):
   # The descriptor for a pylist is like:
   #   ['pylist', element_type]
   sub_vm_list = vm_list.get_as_list(vm_index)
-  element_type_desc = desc[1:]
-  py_items = _extract_vm_sequence_to_python(
-      inv, sub_vm_list, element_type_desc * len(sub_vm_list))
+  py_items = _extract_homogeneous_vm_sequence_to_python(inv, sub_vm_list,
+                                                        plan.sub_plans[0])
   return py_items
 
 
+def _vm_to_unmapped(summary: str):
+  # Descriptors that cannot be mapped are only reported if a value of that
+  # type is actually returned.
+
+  def convert(inv: Invocation, vm_list: VmVariantList, vm_index: int,
+              plan: _ReturnPlan):
+    inv.set_current_return(vm_list, vm_index, plan.desc)
+    _raise_return_error(inv, summary)
+
+  return convert
+
+
 VM_TO_PYTHON_CONVERTERS = {
     "ndarray": _vm_to_ndarray,
     "sdict": _vm_to_sdict,
@@ -282,6 +356,34 @@ VM_TO_PYTHON_CONVERTERS = {
     "bf16": _vm_to_scalar(float),
 }
 
+
+def _build_return_plan(desc) -> _ReturnPlan:
+  vm_type = desc if isinstance(desc, str) else desc[0]
+  converter = VM_TO_PYTHON_CONVERTERS.get(vm_type)
+  if converter is None:
+    return _ReturnPlan(
+        _vm_to_unmapped(f"cannot map VM type to Python: {vm_type}"), desc,
+        None, None, None)
+  dtype = None
+  keys = None
+  sub_plans = None
+  if converter is _vm_to_ndarray:
+    dtype_str = desc[1]
+    dtype = ABI_TYPE_TO_DTYPE.get(dtype_str)
+    if dtype is None:
+      converter = _vm_to_unmapped(f"unrecognized dtype '{dtype_str}'")
+  elif converter is _vm_to_sdict:
+    keys = []
+    sub_plans = []
+    for k, d in desc[1:]:
+      keys.append(k)
+      sub_plans.append(_build_return_plan(d))
+    keys = tuple(keys)
+  elif converter in (_vm_to_slist, _vm_to_stuple, _vm_to_pylist):
+    sub_plans = [_build_return_plan(d) for d in desc[1:]]
+  return _ReturnPlan(converter, desc, dtype, keys, sub_plans)
+
+
 ABI_TYPE_TO_DTYPE = {
     # TODO: Others.
     "f32": np.float32,
@@ -300,31 +402,14 @@ IMPLICIT_BUFFER_ARG_USAGE = (BufferUsage.DISPATCH | BufferUsage.TRANSFER |
                              BufferUsage.MAPPING)
 
 
-def _is_ndarray_descriptor(desc):
-  return desc and desc[0] == "ndarray"
-
-
-def _is_0d_ndarray_descriptor(desc):
-  # Example: ["ndarray", "f32", 0]
-  return desc and desc[0] == "ndarray" and desc[2] == 0
-
-
-def _cast_scalar_to_ndarray(inv: Invocation, x, desc):
-  # Example descriptor: ["ndarray", "f32", 0]
-  dtype_str = desc[1]
-  try:
-    dtype = ABI_TYPE_TO_DTYPE[dtype_str]
-  except KeyError:
-    _raise_argument_error(inv, f"unrecognized dtype '{dtype_str}'")
-  return dtype(x)
-
-
 class ArgumentError(ValueError):
   pass
 
 
 class ReturnError(ValueError):
-  pass
+  # The error without the return that was being decoded (see
+  # _raise_return_error).
+  summary = ""
 
 
 def _raise_argument_error(inv: Invocation,
@@ -344,47 +429,77 @@ def _raise_return_error(inv: Invocation,
                         e: Optional[Exception] = None):
   new_e = ReturnError(f"Error processing function return: {summary} "
                       f"(while decoding return {inv.summarize_return_error()})")
+  new_e.summary = summary
   if e:
     raise new_e from e
   else:
     raise new_e
 
 
-def _extract_vm_sequence_to_python(inv: Invocation, vm_list, descs):
+def _reraise_return_error(inv: Invocation, e: ReturnError, vm_list,
+                          vm_index: int, plan: _ReturnPlan):
+  # Converters raise without recording which return they were decoding, so
+  # the innermost sequence being converted records it and re-raises.
+  if inv.current_return_list is not None:
+    raise e
+  inv.set_current_return(vm_list, vm_index, plan.desc)
+  _raise_return_error(inv, e.summary, e)
+
+
+def _extract_vm_sequence_to_python(inv: Invocation, vm_list, plans):
   vm_list_arity = len(vm_list)
-  if descs is None:
-    descs = [None] * vm_list_arity
-  elif vm_list_arity != len(descs):
+  if vm_list_arity != len(plans):
     _raise_return_error(
-        inv, f"mismatched return arity: {vm_list_arity} vs {len(descs)}")
+        inv, f"mismatched return arity: {vm_list_arity} vs {len(plans)}")
   results = []
-  for vm_index, desc in zip(range(vm_list_arity), descs):
-    inv.current_return_list = vm_list
-    inv.current_return_index = vm_index
-    inv.current_desc = desc
-    if desc is None:
-      # Dynamic (non reflection mode).
-      converted = vm_list.get_variant(vm_index)
-      # Special case: Upgrade HalBufferView to a DeviceArray. We do that here
-      # since this is higher level and it preserves layering. Note that
-      # the reflection case also does this conversion.
-      if isinstance(converted, HalBufferView):
-        converted = DeviceArray(inv.device,
-                                converted,
-                                implicit_host_transfer=True)
-    else:
-      # Known type descriptor.
-      vm_type = desc if isinstance(desc, str) else desc[0]
-      try:
-        converter = VM_TO_PYTHON_CONVERTERS[vm_type]
-      except KeyError:
-        _raise_return_error(inv, f"cannot map VM type to Python: {vm_type}")
-      try:
-        converted = converter(inv, vm_list, vm_index, desc)
-      except ReturnError:
-        raise
-      except Exception as e:
-        _raise_return_error(inv, f"exception converting from VM type to Python",
-                            e)
+  # A single guard for all items, which records the failing one.
+  try:
+    for vm_index, plan in enumerate(plans):
+      results.append(plan.converter(inv, vm_list, vm_index, plan))
+  except ReturnError as e:
+    _reraise_return_error(inv, e, vm_list, vm_index, plan)
+  except Exception as e:
+    inv.set_current_return(vm_list, vm_index, plan.desc)
+    _raise_return_error(inv, f"exception converting from VM type to Python", e)
+  return results
+
+
+def _extract_dynamic_vm_sequence_to_python(inv: Invocation, vm_list):
+  # Dynamic (non reflection mode).
+  results = []
+  for vm_index in range(len(vm_list)):
+    converted = vm_list.get_variant(vm_index)
+    # Special case: Upgrade HalBufferView to a DeviceArray. We do that here
+    # since this is higher level and it preserves layering. Note that
+    # the reflection case also does this conversion.
+    if isinstance(converted, HalBufferView):
+      converted = DeviceArray(inv.device, converted, implicit_host_transfer=True)
     results.append(converted)
   return results
+
+
+def _extract_homogeneous_vm_sequence_to_python(inv: Invocation, vm_list,
+                                               plan: _ReturnPlan):
+  # Like _extract_vm_sequence_to_python but every item shares one plan.
+  converter = plan.converter
+  results = []
+  try:
+    for vm_index in range(len(vm_list)):
+      results.append(converter(inv, vm_list, vm_index, plan))
+  except ReturnError as e:
+    _reraise_return_error(inv, e, vm_list, vm_index, plan)
+  except Exception as e:
+    inv.set_current_return(vm_list, vm_index, plan.desc)
+    _raise_return_error(inv, f"exception converting from VM type to Python", e)
+  return results
+
+
+def _extract_inlined_vm_sequence_to_python(inv: Invocation, vm_list,
+                                           plan: _ReturnPlan):
+  # Equivalent to converting an slist/stuple/sdict whose sub list is vm_list.
+  py_items = _extract_vm_sequence_to_python(inv, vm_list, plan.sub_plans)
+  if plan.converter is _vm_to_sdict:
+    return dict(zip(plan.keys, py_items))
+  elif plan.converter is _vm_to_stuple:
+    return tuple(py_items)
+  return py_items
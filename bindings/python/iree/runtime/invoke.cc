@@ -13,6 +13,7 @@
 #include "iree/hal/api.h"
 #include "iree/modules/hal/module.h"
 #include "iree/vm/api.h"
+#include "pybind11/numpy.h"
 
 namespace iree {
 namespace python {
@@ -158,8 +159,10 @@ class InvokeStatics {
         py::object abi_type = desc[kOne];
         py::object target_dtype = MapElementAbiTypeToDtype(abi_type);
         auto hal_element_type = MapDtypeToElementType(target_dtype);
+        py::dtype target_np_dtype = py::dtype::from_args(target_dtype);
 
-        return [this, target_dtype = std::move(target_dtype), hal_element_type,
+        return [this, target_dtype = std::move(target_dtype),
+                target_np_dtype = std::move(target_np_dtype), hal_element_type,
                 abi_shape = std::move(abi_shape)](InvokeContext &c,
                                                   iree_vm_list_t *list,
                                                   py::handle py_value) {
@@ -180,17 +183,24 @@ class InvokeStatics {
             // array and then convert that.
             IREE_TRACE_SCOPE0("PackHostArray");
             py::object host_array;
-            try {
-              host_array = numpy_module().attr(kAsArray)(py_value, target_dtype,
-                                                         kContiguousArg);
-            } catch (std::exception &e) {
-              std::string msg("could not convert value to numpy array: dtype=");
-              msg.append(py::cast<std::string>(py::repr(target_dtype)));
-              msg.append(", error='");
-              msg.append(e.what());
-              msg.append("', value=");
-              msg.append(py::cast<std::string>(py::repr(py_value)));
-              throw std::invalid_argument(std::move(msg));
+            if (IsCompatibleHostArray(py_value, &target_np_dtype)) {
+              // Short-circuit: An ndarray that is already C-contiguous and of
+              // the target dtype is what np.asarray would return anyway.
+              host_array = py::reinterpret_borrow<py::object>(py_value);
+            } else {
+              try {
+                host_array = numpy_module().attr(kAsArray)(
+                    py_value, target_dtype, kContiguousArg);
+              } catch (std::exception &e) {
+                std::string msg(
+                    "could not convert value to numpy array: dtype=");
+                msg.append(py::cast<std::string>(py::repr(target_dtype)));
+                msg.append(", error='");
+                msg.append(e.what());
+                msg.append("', value=");
+                msg.append(py::cast<std::string>(py::repr(py_value)));
+                throw std::invalid_argument(std::move(msg));
+              }
             }
 
             retained_bv = c.allocator().AllocateBufferCopy(
@@ -364,6 +374,37 @@ class InvokeStatics {
     }
   }
 
+  // Whether |py_value| is an ndarray that can be copied to the device
+  // without conversion: C-contiguous and exactly of |dtype| (if not null).
+  static bool IsCompatibleHostArray(py::handle py_value,
+                                    const py::dtype *dtype) {
+    if (!py::isinstance<py::array>(py_value)) return false;
+    auto array = py::reinterpret_borrow<py::array>(py_value);
+    if (!(array.flags() & py::array::c_style)) return false;
+    return !dtype || array.dtype().is(*dtype);
+  }
+
+  // Packs |py_value| with the generic (non reflection) callback for its
+  // type. Exact ints and floats are by far the most common and are pushed
+  // without going through the type map.
+  void PackGeneric(InvokeContext &c, iree_vm_list_t *list,
+                   py::handle py_value) {
+    if (PyLong_CheckExact(py_value.ptr())) {
+      PackInt(c, list, py_value);
+      return;
+    } else if (PyFloat_CheckExact(py_value.ptr())) {
+      PackFloat(c, list, py_value);
+      return;
+    }
+    PackCallback packer = GetGenericPackCallbackFor(py_value);
+    if (!packer) {
+      std::string message("could not convert python value to VM: ");
+      message.append(py::cast<std::string>(py::repr(py_value)));
+      throw std::invalid_argument(std::move(message));
+    }
+    packer(c, list, py_value);
+  }
+
   PackCallback GetGenericPackCallbackFor(py::handle arg) {
     PopulatePyTypeToPackCallbacks();
     py::type clazz = py::type::of(arg);
@@ -380,20 +421,41 @@ class InvokeStatics {
   }
 
  private:
+  static void PackInt(InvokeContext &c, iree_vm_list_t *list,
+                      py::handle py_value) {
+    iree_vm_value_t vm_value =
+        iree_vm_value_make_i64(py::cast<int64_t>(py_value));
+    CheckApiStatus(iree_vm_list_push_value(list, &vm_value),
+                   "could not append value");
+  }
+
+  static void PackFloat(InvokeContext &c, iree_vm_list_t *list,
+                        py::handle py_value) {
+    iree_vm_value_t vm_value =
+        iree_vm_value_make_f64(py::cast<double>(py_value));
+    CheckApiStatus(iree_vm_list_push_value(list, &vm_value),
+                   "could not append value");
+  }
+
   PackCallback GetGenericPackCallbackForNdarray() {
     return [this](InvokeContext &c, iree_vm_list_t *list, py::handle py_value) {
       IREE_TRACE_SCOPE0("ArgumentPacker::GenericNdarray");
       py::object host_array;
-      try {
-        host_array = numpy_module().attr(kAsArray)(
-            py_value, /*dtype=*/py::none(), kContiguousArg);
-      } catch (std::exception &e) {
-        std::string msg("could not convert value to numpy array: ");
-        msg.append("error='");
-        msg.append(e.what());
-        msg.append("', value=");
-        msg.append(py::cast<std::string>(py::repr(py_value)));
-        throw std::invalid_argument(std::move(msg));
+      if (IsCompatibleHostArray(py_value, /*dtype=*/nullptr)) {
+        // Short-circuit: np.asarray would return a C-contiguous ndarray as-is.
+        host_array = py::reinterpret_borrow<py::object>(py_value);
+      } else {
+        try {
+          host_array = numpy_module().attr(kAsArray)(
+              py_value, /*dtype=*/py::none(), kContiguousArg);
+        } catch (std::exception &e) {
+          std::string msg("could not convert value to numpy array: ");
+          msg.append("error='");
+          msg.append(e.what());
+          msg.append("', value=");
+          msg.append(py::cast<std::string>(py::repr(py_value)));
+          throw std::invalid_argument(std::move(msg));
+        }
       }
 
       auto hal_element_type =
@@ -422,23 +484,8 @@ class InvokeStatics {
     // We only care about int and double in the numeric hierarchy. Since Python
     // has no further refinement of these, just treat them as vm 64 bit int and
     // floats and let the VM take care of it. There isn't much else we can do.
-    AddPackCallback(
-        py::type::of(py::cast(1)),
-        [](InvokeContext &c, iree_vm_list_t *list, py::handle py_value) {
-          iree_vm_value_t vm_value =
-              iree_vm_value_make_i64(py::cast<int64_t>(py_value));
-          CheckApiStatus(iree_vm_list_push_value(list, &vm_value),
-                         "could not append value");
-        });
-
-    AddPackCallback(
-        py::type::of(py::cast(1.0)),
-        [](InvokeContext &c, iree_vm_list_t *list, py::handle py_value) {
-          iree_vm_value_t vm_value =
-              iree_vm_value_make_f64(py::cast<double>(py_value));
-          CheckApiStatus(iree_vm_list_push_value(list, &vm_value),
-                         "could not append value");
-        });
+    AddPackCallback(py::type::of(py::cast(1)), PackInt);
+    AddPackCallback(py::type::of(py::cast(1.0)), PackFloat);
 
     // List/tuple.
     auto sequence_callback = [this](InvokeContext &c, iree_vm_list_t *list,
@@ -446,13 +493,7 @@ class InvokeStatics {
       auto py_seq = py::cast<py::sequence>(py_value);
       VmVariantList item_list = VmVariantList::Create(py::len(py_seq));
       for (py::object py_item : py_seq) {
-        PackCallback sub_packer = GetGenericPackCallbackFor(py_item);
-        if (!sub_packer) {
-          std::string message("could not convert python value to VM: ");
-          message.append(py::cast<std::string>(py::repr(py_item)));
-          throw std::invalid_argument(std::move(message));
-        }
-        sub_packer(c, item_list.raw_ptr(), py_item);
+        PackGeneric(c, item_list.raw_ptr(), py_item);
       }
       // Push the sub list.
       iree_vm_ref_t retained =
@@ -476,13 +517,7 @@ class InvokeStatics {
       VmVariantList item_list = VmVariantList::Create(py_keys.size());
       for (auto py_key : py_keys) {
         py::object py_item = py_dict[py_key];
-        PackCallback sub_packer = GetGenericPackCallbackFor(py_item);
-        if (!sub_packer) {
-          std::string message("could not convert python value to VM: ");
-          message.append(py::cast<std::string>(py::repr(py_item)));
-          throw std::invalid_argument(std::move(message));
-        }
-        sub_packer(c, item_list.raw_ptr(), py_item);
+        PackGeneric(c, item_list.raw_ptr(), py_item);
       }
       // Push the sub list.
       iree_vm_ref_t retained =
@@ -607,23 +642,14 @@ class ArgumentPacker {
 
       VmVariantList arg_list = VmVariantList::Create(pos_args.size());
       for (py::handle py_arg : pos_args) {
-        PackCallback packer = statics_.GetGenericPackCallbackFor(py_arg);
-        if (!packer) {
-          std::string message("could not convert python value to VM: ");
-          message.append(py::cast<std::string>(py::repr(py_arg)));
-          throw std::invalid_argument(std::move(message));
-        }
         // TODO: Better error handling by catching the exception and
         // reporting which arg has a problem.
-        packer(invoke_context, arg_list.raw_ptr(), py_arg);
+        statics_.PackGeneric(invoke_context, arg_list.raw_ptr(), py_arg);
       }
       return arg_list;
     } else {
       IREE_TRACE_SCOPE0("ArgumentPacker::PackReflection");
 
-      // Reflection based dispatch.
-      std::vector<py::handle> py_args(flat_arg_packers_.size());
-
       if (pos_args.size() > pos_only_arg_count_) {
         std::string message("mismatched call arity: expected ");
         message.append(std::to_string(pos_only_arg_count_));
@@ -632,6 +658,22 @@ class ArgumentPacker {
         throw std::invalid_argument(std::move(message));
       }
 
+      // Fast path: All arguments are positional, so there is nothing to
+      // reorder or check for completeness.
+      if (kw_args.empty() && pos_args.size() == flat_arg_packers_.size()) {
+        VmVariantList arg_list =
+            VmVariantList::Create(flat_arg_packers_.size());
+        size_t pos_index = 0;
+        for (py::handle py_arg : pos_args) {
+          flat_arg_packers_[pos_index++](invoke_context, arg_list.raw_ptr(),
+                                         py_arg);
+        }
+        return arg_list;
+      }
+
+      // Reflection based dispatch.
+      std::vector<py::handle> py_args(flat_arg_packers_.size());
+
       // Positional args.
       size_t pos_index = 0;
       for (py::handle py_arg : pos_args) {
@@ -659,13 +701,16 @@ class ArgumentPacker {
         py_args[found_index] = it.second;
       }
 
-      // Now check to see that all args are set.
-      for (size_t i = 0; i < py_args.size(); ++i) {
-        if (!py_args[i]) {
-          std::string message(
-              "mismatched call arity: expected a value for argument ");
-          message.append(std::to_string(i));
-          throw std::invalid_argument(std::move(message));
+      // Now check to see that all args are set. Duplicates were rejected
+      // above, so only scan for the missing one if the counts disagree.
+      if (pos_args.size() + kw_args.size() != py_args.size()) {
+        for (size_t i = 0; i < py_args.size(); ++i) {
+          if (!py_args[i]) {
+            std::string message(
+                "mismatched call arity: expected a value for argument ");
+            message.append(std::to_string(i));
+            throw std::invalid_argument(std::move(message));
+          }
         }
       }
 
@@ -104,12 +104,8 @@ class ContextTracer:
     self._frame_count = 0
     self._file_path = os.path.join(parent.trace_path,
                                    parent.get_unique_name("calls.yaml"))
-    if os.path.exists(self._file_path):
-      # Truncate the file.
-      with open(self._file_path, "wt"):
-        pass
-    else:
-      os.makedirs(os.path.dirname(parent.trace_path), exist_ok=True)
+    # The Tracer created trace_path and the first frame truncates the file, so
+    # no other filesystem setup is needed here.
     logging.info("Tracing context events to: %s", self._file_path)
     self.emit_frame({
         "type": "context_load",
@@ -139,7 +135,9 @@ class ContextTracer:
 
   def emit_frame(self, frame: dict):
     self._frame_count += 1
-    with open(self._file_path, "at") as f:
+    # The first frame replaces any stale file left by an earlier run.
+    mode = "wt" if self._frame_count == 1 else "at"
+    with open(self._file_path, mode) as f:
       if self._frame_count != 1:
         f.write("---\n")
       contents = yaml.dump(frame, sort_keys=False)
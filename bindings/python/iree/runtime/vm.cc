@@ -205,6 +205,11 @@ void VmVariantList::PushBufferView(HalBufferView& buffer_view) {
                  "Error moving buffer view");
 }
 
+void VmVariantList::Clear() {
+  // Truncating releases any retained refs but keeps the storage.
+  CheckApiStatus(iree_vm_list_resize(raw_ptr(), 0), "Could not clear list");
+}
+
 py::object VmVariantList::GetAsList(int index) {
   iree_vm_ref_t ref = {0};
   CheckApiStatus(iree_vm_list_get_ref_assign(raw_ptr(), index, &ref),
@@ -507,6 +512,7 @@ void SetupVmBindings(pybind11::module m) {
       .def("push_int", &VmVariantList::PushInt)
       .def("push_list", &VmVariantList::PushList)
       .def("push_buffer_view", &VmVariantList::PushBufferView)
+      .def("clear", &VmVariantList::Clear)
       .def("__repr__", &VmVariantList::DebugString);
 
   py::class_<iree_vm_function_t>(m, "VmFunction")
@@ -560,6 +566,11 @@ void SetupVmBindings(pybind11::module m) {
       .def_property_readonly(
           "stashed_flatbuffer_blob",
           [](VmModule& self) { return self.get_stashed_flatbuffer_blob(); })
+      .def_property_readonly("function_count",
+                             [](VmModule& self) {
+                               return iree_vm_module_signature(self.raw_ptr())
+                                   .export_function_count;
+                             })
       .def_property_readonly(
           "function_names",
           [](VmModule& self) {
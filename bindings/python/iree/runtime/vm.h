@@ -99,6 +99,7 @@ class VmVariantList {
   void PushInt(int64_t ivalue);
   void PushList(VmVariantList& other);
   void PushBufferView(HalBufferView& buffer_view);
+  void Clear();
   py::object GetAsList(int index);
   py::object GetAsBufferView(int index);
   py::object GetVariant(int index);
@@ -84,6 +84,15 @@ class VmTest(absltest.TestCase):
     l.push_int(10 * 1000 * 1000 * 1000)
     self.assertEqual(str(l), "<VmVariantList(1): [10000000000]>")
 
+  def test_variant_list_clear(self):
+    l = iree.runtime.VmVariantList(5)
+    l.push_int(1)
+    l.push_list(iree.runtime.VmVariantList(1))
+    l.clear()
+    self.assertEqual(str(l), "<VmVariantList(0): []>")
+    l.push_int(2)
+    self.assertEqual(str(l), "<VmVariantList(1): [2]>")
+
   def test_variant_list_buffers(self):
     ET = iree.runtime.HalElementType
     for dt, et in ((np.int8, ET.SINT_8), (np.int16, ET.SINT_16),
@@ -132,6 +141,8 @@ class VmTest(absltest.TestCase):
     self.assertGreaterEqual(f.ordinal, 0)
     notfound = m.lookup_function("notfound")
     self.assertIs(notfound, None)
+    self.assertEqual(m.function_count, len(m.function_names))
+    self.assertIn("simple_mul", m.function_names)
 
   def test_dynamic_module_context(self):
     instance = iree.runtime.VmInstance()
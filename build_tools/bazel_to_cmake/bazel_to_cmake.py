@@ -20,23 +20,50 @@ For usage, see:
 # pylint: disable=missing-docstring
 
 import argparse
+import concurrent.futures
+import contextlib
+import dataclasses
 import datetime
+import functools
+import hashlib
+import io
+import json
 import os
-import re
 import sys
-import textwrap
 from enum import Enum
 
-import bazel_to_cmake_converter
-
 repo_root = None
 
-EDIT_BLOCKING_PATTERN = re.compile(
-    r"bazel[\s_]*to[\s_]*cmake[\s_]*:?[\s_]*do[\s_]*not[\s_]*edit",
-    flags=re.IGNORECASE)
-
 PRESERVE_TAG = "### BAZEL_TO_CMAKE_PRESERVES_ALL_CONTENT_BELOW_THIS_LINE ###"
 
+# The header of generated CMakeLists.txt files. Each line is padded to end with
+# a "#" in the 80th column.
+HEADER_TEMPLATE = "\n".join(["#" * 80] + [
+    "# {autogeneration_line:<77}#",
+    "# {build_file_path:<77}#",
+] + [
+    l.ljust(79) + "#" for l in [
+        "#",
+        "# Use iree_cmake_extra_content from iree/build_defs.oss.bzl to add arbitrary",
+        "# CMake-only content.",
+        "#",
+        f"# To disable autogeneration for this file entirely, delete this header.",
+    ]
+] + ["#" * 80])
+
+# Holds the results of previous runs, relative to the repo root:
+#   conversions.json: the conversion of each BUILD file, keyed by a hash of the
+#     BUILD file and the converter.
+CACHE_DIR_NAME = ".bazel_to_cmake_cache"
+
+
+@dataclasses.dataclass(frozen=True)
+class BuildDirectory:
+  """A directory to convert, with the files found when it was listed."""
+  path: str
+  has_build_file: bool
+  has_cmakelists_file: bool
+
 
 class Status(Enum):
   UPDATED = 1
@@ -70,6 +97,11 @@ def parse_arguments():
       " 1: Also output the name of each directory as it's being processed and"
       " whether the directory is skipped."
       " 2: Also output when conversion was successful.")
+  parser.add_argument(
+      "--no_cache",
+      help="Ignores and does not update the cache of previous conversions.",
+      action="store_true",
+      default=False)
 
   # Specify only one of these (defaults to --root_dir=iree).
   group = parser.add_mutually_exclusive_group()
@@ -100,31 +132,143 @@ def setup_environment():
       os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+# repo_root is fixed once setup_environment has run, so results are per path.
+@functools.lru_cache(maxsize=None)
 def repo_relpath(path):
   return os.path.relpath(path, repo_root).replace("\\", "/")
 
 
+@functools.lru_cache(maxsize=None)
+def get_converter_fingerprint():
+  """Hashes the converter sources, so that changing them invalidates the cache.
+
+  This script is included too, as cached entries may skip regenerating the
+  header and footer it adds.
+  """
+  # Read the sources directly rather than importing the converter here, so
+  # that runs served entirely from the cache never import it.
+  hasher = hashlib.sha256()
+  script_dir = os.path.dirname(os.path.abspath(__file__))
+  for file_name in [
+      "bazel_to_cmake.py", "bazel_to_cmake_converter.py",
+      "bazel_to_cmake_targets.py"
+  ]:
+    with open(os.path.join(script_dir, file_name), "rb") as f:
+      hasher.update(f.read())
+  return hasher.hexdigest()
+
+
+def get_conversion_key(build_file_contents, allow_partial_conversion):
+  hasher = hashlib.sha256()
+  hasher.update(get_converter_fingerprint().encode())
+  hasher.update(str(allow_partial_conversion).encode())
+  hasher.update(build_file_contents)
+  return hasher.hexdigest()
+
+
+def load_conversion_cache():
+  try:
+    with open(os.path.join(repo_root, CACHE_DIR_NAME, "conversions.json")) as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return {}
+
+
+def save_conversion_cache(cache):
+  cache_dir = os.path.join(repo_root, CACHE_DIR_NAME)
+  os.makedirs(cache_dir, exist_ok=True)
+  cache_path = os.path.join(cache_dir, "conversions.json")
+  with open(cache_path + ".tmp", "wt") as f:
+    json.dump(cache, f)
+  os.replace(cache_path + ".tmp", cache_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_autogeneration_tag():
+  return f"Autogenerated by {repo_relpath(os.path.abspath(__file__))}"
+
+
+def scan_directory(directory_path):
+  """Lists directory_path once, returning its BuildDirectory and subdirs."""
+  has_build_file = False
+  has_cmakelists_file = False
+  subdirectory_paths = []
+  with os.scandir(directory_path) as entries:
+    for entry in entries:
+      # Like os.walk, don't descend into symlinked directories.
+      if entry.is_dir(follow_symlinks=False):
+        subdirectory_paths.append(entry.path)
+      elif entry.name == "BUILD":
+        has_build_file = entry.is_file()
+      elif entry.name == "CMakeLists.txt":
+        has_cmakelists_file = entry.is_file()
+  return (BuildDirectory(directory_path, has_build_file, has_cmakelists_file),
+          subdirectory_paths)
+
+
+def iter_build_directories(root_directory_path):
+  """Yields a BuildDirectory for each directory under root with a BUILD file.
+
+  Directories are yielded top-down in the same order as os.walk. The file
+  checks reuse the scandir entries, so no further stats are needed.
+  """
+  try:
+    build_directory, subdirectory_paths = scan_directory(root_directory_path)
+  except OSError:
+    return
+  if build_directory.has_build_file:
+    yield build_directory
+  for subdirectory_path in subdirectory_paths:
+    yield from iter_build_directories(subdirectory_path)
+
+
+def get_file_stat(path):
+  stat_result = os.stat(path)
+  return [stat_result.st_mtime_ns, stat_result.st_size]
+
+
 def log(string, *args, indent=0, **kwargs):
-  print(textwrap.indent(string, prefix=(indent * " ")),
+  if indent:
+    # Log messages never contain blank lines, so every line gets the prefix.
+    prefix = indent * " "
+    string = prefix + string.replace("\n", "\n" + prefix)
+  print(string,
         *args,
         **kwargs,
         file=sys.stderr)
 
 
 def convert_directories(directories, write_files, allow_partial_conversion,
-                        verbosity):
+                        verbosity, use_cache):
+  directories = list(directories)
+  rel_dir_paths = [repo_relpath(directory.path) for directory in directories]
+  cache = load_conversion_cache() if use_cache else {}
+  cached_conversions = [
+      cache.get(rel_dir_path) for rel_dir_path in rel_dir_paths
+  ]
+  convert = functools.partial(convert_directory,
+                              write_files=write_files,
+                              allow_partial_conversion=allow_partial_conversion,
+                              verbosity=verbosity)
+  if write_files:
+    # Directories are converted independently, so spread them over processes.
+    with concurrent.futures.ProcessPoolExecutor(
+        initializer=setup_environment) as executor:
+      results = list(
+          executor.map(convert, directories, cached_conversions, chunksize=16))
+  else:
+    # Previews print each converted file, so stay serial to keep them in order.
+    results = list(map(convert, directories, cached_conversions))
+
   failure_dirs = []
   skip_count = 0
   success_count = 0
   noop_count = 0
-  for directory in directories:
-    status = convert_directory(
-        directory,
-        write_files=write_files,
-        allow_partial_conversion=allow_partial_conversion,
-        verbosity=verbosity)
+  for rel_dir_path, (status, conversion) in zip(rel_dir_paths, results):
+    if conversion is not None:
+      cache[rel_dir_path] = conversion
     if status == Status.FAILED:
-      failure_dirs.append(repo_relpath(directory))
+      failure_dirs.append(rel_dir_path)
     elif status == Status.SKIPPED:
       skip_count += 1
     elif status == Status.UPDATED:
@@ -132,6 +276,9 @@ def convert_directories(directories, write_files, allow_partial_conversion,
     elif status == Status.NOOP:
       noop_count += 1
 
+  if write_files and use_cache:
+    save_conversion_cache(cache)
+
   log(f"{success_count} CMakeLists.txt files were updated, {skip_count} were"
       f" skipped, and {noop_count} required no change.")
   if failure_dirs:
@@ -141,96 +288,128 @@ def convert_directories(directories, write_files, allow_partial_conversion,
     sys.exit(1)
 
 
-def convert_directory(directory_path, write_files, allow_partial_conversion,
-                      verbosity):
-  if not os.path.isdir(directory_path):
-    raise FileNotFoundError(f"Cannot find directory '{directory_path}'")
+def convert_directory(*args, **kwargs):
+  """Converts the BUILD file in a BuildDirectory to CMakeLists.txt.
+
+  Log messages for the directory are buffered and written to stderr at once,
+  so that messages from directories converted in parallel don't interleave.
+
+  Returns:
+    The Status of the conversion and, if the BUILD file was converted, a cache
+    entry for its conversion (cached_conversion if that was reused).
+  """
+  messages = io.StringIO()
+  try:
+    with contextlib.redirect_stderr(messages):
+      return _convert_directory(*args, **kwargs)
+  finally:
+    sys.stderr.write(messages.getvalue())
+
 
+def _convert_directory(directory, cached_conversion, write_files,
+                       allow_partial_conversion, verbosity):
+  directory_path = directory.path
   rel_dir_path = repo_relpath(directory_path)
   if verbosity >= 1:
     log(f"Processing {rel_dir_path}")
 
-  build_file_path = os.path.join(directory_path, "BUILD")
-  cmakelists_file_path = os.path.join(directory_path, "CMakeLists.txt")
+  # Plain concatenation suffices for these fixed file names.
+  build_file_path = directory_path + os.sep + "BUILD"
+  cmakelists_file_path = directory_path + os.sep + "CMakeLists.txt"
 
   rel_cmakelists_file_path = repo_relpath(cmakelists_file_path)
   rel_build_file_path = repo_relpath(build_file_path)
 
-  if not os.path.isfile(build_file_path):
-    return Status.NO_BUILD_FILE
-
-  autogeneration_tag = f"Autogenerated by {repo_relpath(os.path.abspath(__file__))}"
-
-  header = "\n".join(["#" * 80] + [
-      l.ljust(79) + "#" for l in [
-          f"# {autogeneration_tag} from",
-          f"# {rel_build_file_path}",
-          "#",
-          "# Use iree_cmake_extra_content from iree/build_defs.oss.bzl to add arbitrary",
-          "# CMake-only content.",
-          "#",
-          f"# To disable autogeneration for this file entirely, delete this header.",
-      ]
-  ] + ["#" * 80])
-
-  old_lines = []
-  preserved_footer_lines = ["\n" + PRESERVE_TAG + "\n"]
-  if os.path.isfile(cmakelists_file_path):
-    found_autogeneration_tag = False
-    found_preserve_tag = False
+  if not directory.has_build_file:
+    return Status.NO_BUILD_FILE, None
+  # Kept as bytes: they are hashed and compiled as is, without decoding.
+  with open(build_file_path, "rb") as build_file:
+    build_file_contents = build_file.read()
+
+  conversion_key = get_conversion_key(build_file_contents,
+                                      allow_partial_conversion)
+  is_cached = (cached_conversion is not None and
+               cached_conversion["key"] == conversion_key)
+  # If neither the BUILD file, the converter, nor the CMakeLists.txt we last
+  # wrote or checked have changed, the file is still up to date without
+  # reading it. Like make, this trusts the file's mtime and size.
+  if (write_files and is_cached and directory.has_cmakelists_file and
+      cached_conversion.get("cmakelists_stat") == get_file_stat(
+          cmakelists_file_path)):
+    if verbosity >= 2:
+      log(f"{rel_cmakelists_file_path} required no update", indent=2)
+    return Status.NOOP, cached_conversion
+
+  autogeneration_tag = get_autogeneration_tag()
+  header = HEADER_TEMPLATE.format(
+      autogeneration_line=f"{autogeneration_tag} from",
+      build_file_path=rel_build_file_path)
+
+  old_content = ""
+  preserved_footer = "\n" + PRESERVE_TAG + "\n"
+  if directory.has_cmakelists_file:
     with open(cmakelists_file_path) as f:
-      old_lines = f.readlines()
-
-    for line in old_lines:
-      if not found_autogeneration_tag and autogeneration_tag in line:
-        found_autogeneration_tag = True
-      if not found_preserve_tag and PRESERVE_TAG in line:
-        found_preserve_tag = True
-      elif found_preserve_tag:
-        preserved_footer_lines.append(line)
-    if not found_autogeneration_tag:
+      old_content = f.read()
+
+    if autogeneration_tag not in old_content:
       if verbosity >= 1:
         log(f"Skipped. Did not find autogeneration line.", indent=2)
-      return Status.SKIPPED
-  preserved_footer = "".join(preserved_footer_lines)
+      return Status.SKIPPED, None
+    # Everything after the line holding the preserve tag is kept as is.
+    _, found_preserve_tag, footer = old_content.partition(PRESERVE_TAG)
+    if found_preserve_tag:
+      preserved_footer += footer.partition("\n")[2]
+
+  if is_cached:
+    # The BUILD file and converter are unchanged since the cached conversion.
+    converted_build_file = cached_conversion["converted"]
+  else:
+    # Imported here so that --help and fully cached runs skip loading it.
+    import bazel_to_cmake_converter
+
+    build_file_code = compile(build_file_contents, build_file_path, "exec")
+    try:
+      converted_build_file = bazel_to_cmake_converter.convert_build_file(
+          build_file_code, allow_partial_conversion=allow_partial_conversion)
+    except (NameError, NotImplementedError) as e:
+      log(
+          f"ERROR generating {rel_dir_path}.\n"
+          f"Missing a rule handler in bazel_to_cmake_converter.py?\n"
+          f"Reason: `{type(e).__name__}: {e}`",
+          indent=2)
+      return Status.FAILED, None
+    except KeyError as e:
+      log(
+          f"ERROR generating {rel_dir_path}.\n"
+          f"Missing a conversion in bazel_to_cmake_targets.py?\n"
+          f"Reason: `{type(e).__name__}: {e}`",
+          indent=2)
+      return Status.FAILED, None
+  conversion = {"key": conversion_key, "converted": converted_build_file}
 
-  with open(build_file_path, "rt") as build_file:
-    build_file_code = compile(build_file.read(), build_file_path, "exec")
-  try:
-    converted_build_file = bazel_to_cmake_converter.convert_build_file(
-        build_file_code, allow_partial_conversion=allow_partial_conversion)
-  except (NameError, NotImplementedError) as e:
-    log(
-        f"ERROR generating {rel_dir_path}.\n"
-        f"Missing a rule handler in bazel_to_cmake_converter.py?\n"
-        f"Reason: `{type(e).__name__}: {e}`",
-        indent=2)
-    return Status.FAILED
-  except KeyError as e:
-    log(
-        f"ERROR generating {rel_dir_path}.\n"
-        f"Missing a conversion in bazel_to_cmake_targets.py?\n"
-        f"Reason: `{type(e).__name__}: {e}`",
-        indent=2)
-    return Status.FAILED
   converted_content = header + converted_build_file + preserved_footer
-  if write_files:
-    with open(cmakelists_file_path, "wt") as cmakelists_file:
-      cmakelists_file.write(converted_content)
-  else:
+  if not write_files:
     print(converted_content, end="")
 
-  if converted_content == "".join(old_lines):
+  if converted_content == old_content:
+    if write_files:
+      conversion["cmakelists_stat"] = get_file_stat(cmakelists_file_path)
     if verbosity >= 2:
       log(f"{rel_cmakelists_file_path} required no update", indent=2)
-    return Status.NOOP
+    return Status.NOOP, conversion
+
+  # Only touch files that actually change, so their mtimes stay put otherwise.
+  if write_files:
+    with open(cmakelists_file_path, "wb") as cmakelists_file:
+      cmakelists_file.write(converted_content.encode("utf-8"))
+    conversion["cmakelists_stat"] = get_file_stat(cmakelists_file_path)
 
   if verbosity >= 2:
     log(
         f"Successfly generated {rel_cmakelists_file_path}"
         f" from {rel_build_file_path}",
         indent=2)
-  return Status.UPDATED
+  return Status.UPDATED, conversion
 
 
 def main(args):
@@ -242,15 +421,20 @@ def main(args):
   if args.root_dir:
     root_directory_path = os.path.join(repo_root, args.root_dir)
     log(f"Converting directory tree rooted at: {root_directory_path}")
-    convert_directories((root for root, _, _ in os.walk(root_directory_path)),
+    convert_directories(iter_build_directories(root_directory_path),
                         write_files=write_files,
                         allow_partial_conversion=args.allow_partial_conversion,
-                        verbosity=args.verbosity)
+                        verbosity=args.verbosity,
+                        use_cache=not args.no_cache)
   elif args.dir:
-    convert_directories([os.path.join(repo_root, args.dir)],
+    directory_path = os.path.join(repo_root, args.dir)
+    if not os.path.isdir(directory_path):
+      raise FileNotFoundError(f"Cannot find directory '{directory_path}'")
+    convert_directories([scan_directory(directory_path)[0]],
                         write_files=write_files,
                         allow_partial_conversion=args.allow_partial_conversion,
-                        verbosity=args.verbosity)
+                        verbosity=args.verbosity,
+                        use_cache=not args.no_cache)
 
 
 if __name__ == "__main__":
@@ -14,8 +14,9 @@ See bazel_to_cmake.py for usage.
 # pylint: disable=unused-argument
 # pylint: disable=exec-used
 
-import itertools
+import functools
 import re
+import sys
 
 import bazel_to_cmake_targets
 
@@ -29,6 +30,20 @@ def _expand_cmake_var(var):
   return "${" + var + "}"
 
 
+_CMAKE_CURRENT_SOURCE_DIR = _expand_cmake_var("CMAKE_CURRENT_SOURCE_DIR")
+
+
+def _convert_glob_var(pattern):
+  # Bazel `*.mlir` glob -> CMake Variable `_GLOB_X_MLIR`
+  return "_GLOB_" + pattern.replace("*", "X").replace(".", "_").upper()
+
+
+def _convert_glob_block(var, pattern):
+  return (f"file(GLOB {var} LIST_DIRECTORIES false"
+          f" RELATIVE {_CMAKE_CURRENT_SOURCE_DIR}"
+          f" CONFIGURE_DEPENDS {pattern})\n")
+
+
 def _convert_string_arg_block(name, value, quote=True):
   #  NAME
   #    "value"
@@ -46,13 +61,22 @@ def _convert_string_list_block(name, values, quote=True, sort=False):
   if values is None:
     return ""
 
+  values = list(values)
+  if not values:
+    return f"  {name}\n\n"
+  # Single values (e.g. one dep or one backend) are common, and need neither
+  # sorting nor joining.
+  if len(values) == 1:
+    return _convert_string_arg_block(name, values[0], quote=quote)
   if sort:
-    values = sorted(values)
+    values.sort()
 
+  # Values are Bazel strings, so a single join over them builds the block
+  # without formatting each value separately.
   if quote:
-    values_list = "\n".join([f'    "{v}"' for v in values])
+    values_list = '    "' + '"\n    "'.join(values) + '"'
   else:
-    values_list = "\n".join([f"    {v}" for v in values])
+    values_list = "    " + "\n    ".join(values)
 
   return f"  {name}\n{values_list}\n"
 
@@ -66,29 +90,41 @@ def _convert_option_block(option, option_value):
     return ""
 
 
-def _convert_target_block(name, target):
-  if target is None:
-    return ""
+@functools.lru_cache(maxsize=None)
+def _convert_binary_target(target):
   # Bazel target name to cmake binary name
   # Bazel `//iree/custom:custom-translate` -> CMake `iree_custom_custom-translate`
   target = target.replace("//iree", "iree")  # iree/custom:custom-translate
   target = target.replace(":", "_")  # iree/custom_custom-translate
   target = target.replace("/", "_")  # iree_custom_custom-translate
-  return _convert_string_arg_block(name, target, quote=False)
+  return target
+
+
+def _convert_target_block(name, target):
+  if target is None:
+    return ""
+  return _convert_string_arg_block(name,
+                                   _convert_binary_target(target),
+                                   quote=False)
 
 
 def _convert_srcs_block(srcs):
   if srcs is None:
     return ""
-  generated_srcs = [src for src in srcs if src.startswith(":")]
-  srcs = [src for src in srcs if src not in generated_srcs]
+  # Split into source and generated (`:`-prefixed) files in a single pass.
+  source_srcs = []
+  generated_srcs = []
+  for src in srcs:
+    if src.startswith(":"):
+      generated_srcs.append(src[1:])
+    else:
+      source_srcs.append(src)
   sets = []
-  if srcs:
-    sets.append(_convert_string_list_block("SRCS", srcs, sort=True))
+  if source_srcs:
+    sets.append(_convert_string_list_block("SRCS", source_srcs, sort=True))
   if generated_srcs:
     sets.append(
-        _convert_string_list_block("GENERATED_SRCS",
-                                   [src[1:] for src in generated_srcs],
+        _convert_string_list_block("GENERATED_SRCS", generated_srcs,
                                    sort=True))
   return "\n".join(sets)
 
@@ -117,18 +153,23 @@ def _convert_tblgen_block(tblgen):
     return ""
 
 
+@functools.lru_cache(maxsize=None)
 def _convert_target(target):
-  """Returns a list of targets that correspond to the specified Bazel target.
-  Note that this must be a list because some targets have a one to many mapping.
+  """Returns a tuple of targets that correspond to the specified Bazel target.
+  Note that this must be a sequence because some targets have a one to many
+  mapping. Results are cached, as the same deps recur across rules and BUILD
+  files, so they are returned as immutable tuples. The converted names are
+  interned, so that deduplicating them mostly compares by identity.
   """
-  return bazel_to_cmake_targets.convert_target(target)
+  return tuple(
+      sys.intern(t) for t in bazel_to_cmake_targets.convert_target(target))
 
 
 def _convert_single_target(target):
   replacement_targets = _convert_target(target)
   if len(replacement_targets) != 1:
     raise RuntimeError(f"Expected single target replacement for {target},"
-                       f" but got multiple: {replacement_targets}")
+                       f" but got multiple: {list(replacement_targets)}")
   return replacement_targets[0]
 
 
@@ -145,13 +186,12 @@ def _convert_target_list_block(list_name, targets):
   #    package1::target1
   #    package1::target2
   #    package2::target
-  targets = [_convert_target(t) for t in targets]
-  # Flatten lists
-  targets = list(itertools.chain.from_iterable(targets))
-  # Remove duplicates
-  targets = set(targets)
-  # Remove Falsey (None and empty string) values
-  targets = filter(None, targets)
+  # Flatten lists, remove duplicates and remove Falsey (None and empty string)
+  # values in one pass. _convert_string_list_block sorts the result once.
+  targets = {
+      converted for t in targets for converted in _convert_target(t)
+      if converted
+  }
 
   return _convert_string_list_block(list_name, targets, sort=True, quote=False)
 
@@ -193,7 +233,7 @@ class BuildFileFunctions(object):
     # prevents changes with this phrase from being submitted.
     # Written as separate literals to avoid the check triggering here.
     submit_blocker = "DO" + " NOT" + " SUBMIT."
-    self.converter.body += f"# {submit_blocker} {message}\n"
+    self.converter.body.append(f"# {submit_blocker} {message}\n")
 
   # ------------------------------------------------------------------------- #
   # Function handlers that convert BUILD definitions to CMake definitions.    #
@@ -258,25 +298,18 @@ class BuildFileFunctions(object):
         # emulate them or silently give different behavior, just error out.
         # See https://docs.bazel.build/versions/master/be/functions.html#glob
         raise NotImplementedError("Recursive globs not supported")
-      # Bazel `*.mlir` glob -> CMake Variable `_GLOB_X_MLIR`
-      var = "_GLOB_" + pattern.replace("*", "X").replace(".", "_").upper()
+      var = _convert_glob_var(pattern)
       glob_vars.append(var)
-      self.converter.body += (
-          f"file(GLOB {var} LIST_DIRECTORIES false"
-          f" RELATIVE {_expand_cmake_var('CMAKE_CURRENT_SOURCE_DIR')}"
-          f" CONFIGURE_DEPENDS {pattern})\n")
+      self.converter.body.append(_convert_glob_block(var, pattern))
     for pattern in exclude:
       if "**" in pattern:
         raise NotImplementedError("Recursive globs not supported")
-      exclude_var = ("_GLOB_" +
-                     pattern.replace("*", "X").replace(".", "_").upper())
-      self.converter.body += (
-          f"file(GLOB {exclude_var} LIST_DIRECTORIES false"
-          f" RELATIVE {_expand_cmake_var('CMAKE_CURRENT_SOURCE_DIR')}"
-          f" CONFIGURE_DEPENDS {pattern})\n")
+      exclude_var = _convert_glob_var(pattern)
+      self.converter.body.append(_convert_glob_block(exclude_var, pattern))
+      expanded_exclude_var = _expand_cmake_var(exclude_var)
       for glob_var in glob_vars:
-        self.converter.body += (
-            f"list(REMOVE_ITEM {glob_var} {_expand_cmake_var(exclude_var)})\n")
+        self.converter.body.append(
+            f"list(REMOVE_ITEM {glob_var} {expanded_exclude_var})\n")
     return [_expand_cmake_var(var) for var in glob_vars]
 
   # TODO(gcmn) implement these types of functions in a less hard-coded way
@@ -313,17 +346,17 @@ class BuildFileFunctions(object):
     deps_block = _convert_target_list_block("DEPS", deps)
     testonly_block = _convert_option_block("TESTONLY", testonly)
 
-    self.converter.body += (f"iree_cc_library(\n"
-                            f"{name_block}"
-                            f"{copts_block}"
-                            f"{hdrs_block}"
-                            f"{textual_hdrs_block}"
-                            f"{srcs_block}"
-                            f"{data_block}"
-                            f"{deps_block}"
-                            f"{defines_block}"
-                            f"{testonly_block}"
-                            f"  PUBLIC\n)\n\n")
+    self.converter.body.append(f"iree_cc_library(\n"
+                               f"{name_block}"
+                               f"{copts_block}"
+                               f"{hdrs_block}"
+                               f"{textual_hdrs_block}"
+                               f"{srcs_block}"
+                               f"{data_block}"
+                               f"{deps_block}"
+                               f"{defines_block}"
+                               f"{testonly_block}"
+                               f"  PUBLIC\n)\n\n")
 
   def cc_test(self,
               name,
@@ -346,17 +379,17 @@ class BuildFileFunctions(object):
     args_block = _convert_string_list_block("ARGS", args)
     labels_block = _convert_string_list_block("LABELS", tags)
 
-    self.converter.body += (f"iree_cc_test(\n"
-                            f"{name_block}"
-                            f"{hdrs_block}"
-                            f"{srcs_block}"
-                            f"{copts_block}"
-                            f"{defines_block}"
-                            f"{data_block}"
-                            f"{deps_block}"
-                            f"{args_block}"
-                            f"{labels_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_cc_test(\n"
+                               f"{name_block}"
+                               f"{hdrs_block}"
+                               f"{srcs_block}"
+                               f"{copts_block}"
+                               f"{defines_block}"
+                               f"{data_block}"
+                               f"{deps_block}"
+                               f"{args_block}"
+                               f"{labels_block}"
+                               f")\n\n")
 
   def cc_binary(self,
                 name,
@@ -378,15 +411,15 @@ class BuildFileFunctions(object):
     deps_block = _convert_target_list_block("DEPS", deps)
     testonly_block = _convert_option_block("TESTONLY", testonly)
 
-    self.converter.body += (f"iree_cc_binary(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f"{copts_block}"
-                            f"{defines_block}"
-                            f"{data_block}"
-                            f"{deps_block}"
-                            f"{testonly_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_cc_binary(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f"{copts_block}"
+                               f"{defines_block}"
+                               f"{data_block}"
+                               f"{deps_block}"
+                               f"{testonly_block}"
+                               f")\n\n")
 
   # Effectively an alias in IREE code.
   iree_cc_binary = cc_binary
@@ -411,24 +444,24 @@ class BuildFileFunctions(object):
     identifier_block = _convert_string_arg_block("IDENTIFIER", identifier)
     flatten_block = _convert_option_block("FLATTEN", flatten)
 
-    self.converter.body += (f"iree_c_embed_data(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f"{c_file_output_block}"
-                            f"{h_file_output_block}"
-                            f"{identifier_block}"
-                            f"{testonly_block}"
-                            f"{flatten_block}"
-                            f"  PUBLIC\n)\n\n")
+    self.converter.body.append(f"iree_c_embed_data(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f"{c_file_output_block}"
+                               f"{h_file_output_block}"
+                               f"{identifier_block}"
+                               f"{testonly_block}"
+                               f"{flatten_block}"
+                               f"  PUBLIC\n)\n\n")
 
   def spirv_kernel_cc_library(self, name, srcs):
     name_block = _convert_string_arg_block("NAME", name, quote=False)
     srcs_block = _convert_srcs_block(srcs)
 
-    self.converter.body += (f"iree_spirv_kernel_cc_library(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_spirv_kernel_cc_library(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f")\n\n")
 
   def iree_bytecode_module(self,
                            name,
@@ -447,26 +480,26 @@ class BuildFileFunctions(object):
     opt_flags_block = _convert_string_list_block("OPT_FLAGS", opt_flags)
     testonly_block = _convert_option_block("TESTONLY", testonly)
 
-    self.converter.body += (f"iree_bytecode_module(\n"
-                            f"{name_block}"
-                            f"{src_block}"
-                            f"{c_identifier_block}"
-                            f"{translate_tool_block}"
-                            f"{flags_block}"
-                            f"{opt_flags_block}"
-                            f"{testonly_block}"
-                            f"  PUBLIC\n)\n\n")
+    self.converter.body.append(f"iree_bytecode_module(\n"
+                               f"{name_block}"
+                               f"{src_block}"
+                               f"{c_identifier_block}"
+                               f"{translate_tool_block}"
+                               f"{flags_block}"
+                               f"{opt_flags_block}"
+                               f"{testonly_block}"
+                               f"  PUBLIC\n)\n\n")
 
   def iree_flatbuffer_c_library(self, name, srcs, flatcc_args=None):
     name_block = _convert_string_arg_block("NAME", name, quote=False)
     srcs_block = _convert_srcs_block(srcs)
     flatcc_args_block = _convert_string_list_block("FLATCC_ARGS", flatcc_args)
 
-    self.converter.body += (f"flatbuffer_c_library(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f"{flatcc_args_block}"
-                            f"  PUBLIC\n)\n\n")
+    self.converter.body.append(f"flatbuffer_c_library(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f"{flatcc_args_block}"
+                               f"  PUBLIC\n)\n\n")
 
   def gentbl_cc_library(self,
                         name,
@@ -483,12 +516,12 @@ class BuildFileFunctions(object):
     td_file_block = _convert_td_file_block(td_file)
     outs_block = _convert_tbl_outs_block(tbl_outs)
 
-    self.converter.body += (f"iree_tablegen_library(\n"
-                            f"{name_block}"
-                            f"{td_file_block}"
-                            f"{outs_block}"
-                            f"{tblgen_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_tablegen_library(\n"
+                               f"{name_block}"
+                               f"{td_file_block}"
+                               f"{outs_block}"
+                               f"{tblgen_block}"
+                               f")\n\n")
 
   def iree_tablegen_doc(self,
                         name,
@@ -504,12 +537,12 @@ class BuildFileFunctions(object):
     td_file_block = _convert_td_file_block(td_file)
     outs_block = _convert_tbl_outs_block(tbl_outs)
 
-    self.converter.body += (f"iree_tablegen_doc(\n"
-                            f"{name_block}"
-                            f"{td_file_block}"
-                            f"{outs_block}"
-                            f"{tblgen_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_tablegen_doc(\n"
+                               f"{name_block}"
+                               f"{td_file_block}"
+                               f"{outs_block}"
+                               f"{tblgen_block}"
+                               f")\n\n")
 
   def iree_lit_test_suite(self,
                           name,
@@ -524,13 +557,13 @@ class BuildFileFunctions(object):
     data_block = _convert_target_list_block("DATA", data)
     labels_block = _convert_string_list_block("LABELS", tags)
 
-    self.converter.body += (f"iree_lit_test_suite(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f"{tools_block}"
-                            f"{data_block}"
-                            f"{labels_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_lit_test_suite(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f"{tools_block}"
+                               f"{data_block}"
+                               f"{labels_block}"
+                               f")\n\n")
 
   def iree_check_single_backend_test_suite(self,
                                            name,
@@ -557,17 +590,17 @@ class BuildFileFunctions(object):
     target_cpu_features_block = _convert_string_arg_block(
         "TARGET_CPU_FEATURES", target_cpu_features)
 
-    self.converter.body += (f"iree_check_single_backend_test_suite(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f"{target_backend_block}"
-                            f"{driver_block}"
-                            f"{compiler_flags_block}"
-                            f"{runner_args_block}"
-                            f"{labels_block}"
-                            f"{opt_flags_block}"
-                            f"{target_cpu_features_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_check_single_backend_test_suite(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f"{target_backend_block}"
+                               f"{driver_block}"
+                               f"{compiler_flags_block}"
+                               f"{runner_args_block}"
+                               f"{labels_block}"
+                               f"{opt_flags_block}"
+                               f"{target_cpu_features_block}"
+                               f")\n\n")
 
   def iree_check_test_suite(self,
                             name,
@@ -598,17 +631,17 @@ class BuildFileFunctions(object):
     target_cpu_features_variants_block = _convert_string_list_block(
         "TARGET_CPU_FEATURES_VARIANTS", target_cpu_features_variants)
 
-    self.converter.body += (f"iree_check_test_suite(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f"{target_backends_block}"
-                            f"{drivers_block}"
-                            f"{compiler_flags_block}"
-                            f"{runner_args_block}"
-                            f"{labels_block}"
-                            f"{opt_flags_block}"
-                            f"{target_cpu_features_variants_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_check_test_suite(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f"{target_backends_block}"
+                               f"{drivers_block}"
+                               f"{compiler_flags_block}"
+                               f"{runner_args_block}"
+                               f"{labels_block}"
+                               f"{opt_flags_block}"
+                               f"{target_cpu_features_variants_block}"
+                               f")\n\n")
 
   def iree_generated_trace_runner_test(self,
                                        name,
@@ -650,19 +683,19 @@ class BuildFileFunctions(object):
     target_cpu_features_variants_block = _convert_string_list_block(
         "TARGET_CPU_FEATURES_VARIANTS", target_cpu_features_variants)
 
-    self.converter.body += (f"iree_generated_trace_runner_test(\n"
-                            f"{name_block}"
-                            f"{generator_block}"
-                            f"{generator_args_block}"
-                            f"{trace_runner_block}"
-                            f"{target_backends_block}"
-                            f"{drivers_block}"
-                            f"{compiler_flags_block}"
-                            f"{runner_args_block}"
-                            f"{labels_block}"
-                            f"{opt_flags_block}"
-                            f"{target_cpu_features_variants_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_generated_trace_runner_test(\n"
+                               f"{name_block}"
+                               f"{generator_block}"
+                               f"{generator_args_block}"
+                               f"{trace_runner_block}"
+                               f"{target_backends_block}"
+                               f"{drivers_block}"
+                               f"{compiler_flags_block}"
+                               f"{runner_args_block}"
+                               f"{labels_block}"
+                               f"{opt_flags_block}"
+                               f"{target_cpu_features_variants_block}"
+                               f")\n\n")
 
   def iree_e2e_cartesian_product_test_suite(self,
                                             name,
@@ -714,13 +747,13 @@ class BuildFileFunctions(object):
         failing_configurations_block = _convert_string_list_block(
             "FAILING_CONFIGURATIONS", failing_configuration_strings)
 
-    self.converter.body += (f"iree_e2e_cartesian_product_test_suite(\n"
-                            f"{name_block}"
-                            f"{matrix_keys_block}"
-                            f"{matrix_values_block}"
-                            f"{failing_configurations_block}"
-                            f"{labels_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_e2e_cartesian_product_test_suite(\n"
+                               f"{name_block}"
+                               f"{matrix_keys_block}"
+                               f"{matrix_values_block}"
+                               f"{failing_configurations_block}"
+                               f"{labels_block}"
+                               f")\n\n")
 
   def native_test(self, name, src, args=None, data=None, tags=None):
     if data is not None:
@@ -731,12 +764,12 @@ class BuildFileFunctions(object):
     args_block = _convert_string_list_block("ARGS", args)
     labels_block = _convert_string_list_block("LABELS", tags)
 
-    self.converter.body += (f"iree_native_test(\n"
-                            f"{name_block}"
-                            f"{args_block}"
-                            f"{test_binary_block}"
-                            f"{labels_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_native_test(\n"
+                               f"{name_block}"
+                               f"{args_block}"
+                               f"{test_binary_block}"
+                               f"{labels_block}"
+                               f")\n\n")
 
   def cc_binary_benchmark(
       self,
@@ -763,23 +796,23 @@ class BuildFileFunctions(object):
     testonly_block = _convert_option_block("TESTONLY", testonly)
     labels_block = _convert_string_list_block("LABELS", tags)
 
-    self.converter.body += (f"iree_cc_binary_benchmark(\n"
-                            f"{name_block}"
-                            f"{srcs_block}"
-                            f"{data_block}"
-                            f"{deps_block}"
-                            f"{copts_block}"
-                            f"{defines_block}"
-                            f"{defines_block}"
-                            f"{testonly_block}"
-                            f"{labels_block}"
-                            f")\n\n")
+    self.converter.body.append(f"iree_cc_binary_benchmark(\n"
+                               f"{name_block}"
+                               f"{srcs_block}"
+                               f"{data_block}"
+                               f"{deps_block}"
+                               f"{copts_block}"
+                               f"{defines_block}"
+                               f"{defines_block}"
+                               f"{testonly_block}"
+                               f"{labels_block}"
+                               f")\n\n")
 
   def iree_cmake_extra_content(self, content, inline=False):
     if inline:
-      self.converter.body += (f"\n{content}\n")
+      self.converter.body.append(f"\n{content}\n")
     else:
-      self.converter.header += (f"\n{content}\n")
+      self.converter.header.append(f"\n{content}\n")
 
 
 class Converter(object):
@@ -787,16 +820,17 @@ class Converter(object):
 
   def __init__(self):
     # Header appears after the license block but before `iree_add_all_subdirs`.
-    self.header = ""
+    # Header and body are lists of fragments, joined once in convert().
+    self.header = []
     # Body appears after `iree_add_all_subdirs`.
-    self.body = ""
+    self.body = []
 
     self.first_error = None
 
   def convert(self):
-    converted_content = (f"{self.header}\n\n"
+    converted_content = (f"{''.join(self.header)}\n\n"
                          f"iree_add_all_subdirs()\n\n"
-                         f"{self.body}")
+                         f"{''.join(self.body)}")
 
     # Cleanup newline characters. This is more convenient than ensuring all
     # conversions are careful with where they insert newlines.
@@ -806,11 +840,17 @@ class Converter(object):
     return converted_content
 
 
+@functools.lru_cache(maxsize=None)
+def _GetPublicClassAttributeNames(cls):
+  # Computed once per class rather than calling dir() for every BUILD file.
+  return tuple(k for k in dir(cls) if not k.startswith("_"))
+
+
 def GetDict(obj):
-  ret = {}
-  for k in dir(obj):
+  ret = {k: getattr(obj, k) for k in _GetPublicClassAttributeNames(type(obj))}
+  for k, v in vars(obj).items():
     if not k.startswith("_"):
-      ret[k] = getattr(obj, k)
+      ret[k] = v
   return ret
 
 
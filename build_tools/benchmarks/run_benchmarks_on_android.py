@@ -65,6 +65,9 @@ ANDROID_TMP_DIR = "/data/local/tmp/iree-benchmarks"
 NORMAL_TOOL_REL_DIR = "normal-tools"
 TRACED_TOOL_REL_DIR = "traced-tools"
 
+# The line the traced benchmark tool prints once a result is available.
+BENCHMARK_RESULT_LINE_PATTERN = re.compile(r"^BM_.+/real_time")
+
 
 def get_benchmark_repetition_count(runner: str) -> int:
   """Returns the benchmark repetition count for the given runner."""
@@ -131,7 +134,8 @@ def adb_execute_and_get_output(cmd_args: Sequence[str],
 
 def adb_execute(cmd_args: Sequence[str],
                 relative_dir: str = "",
-                verbose: bool = False) -> subprocess.CompletedProcess:
+                verbose: bool = False,
+                **kwargs) -> subprocess.CompletedProcess:
   """Executes command with adb shell.
 
   Switches to `relative_dir` relative to the android tmp directory before
@@ -141,6 +145,7 @@ def adb_execute(cmd_args: Sequence[str],
     cmd_args: a list containing the command to execute and its parameters
     relative_dir: the directory to execute the command in; relative to
       ANDROID_TMP_DIR.
+    **kwargs: extra arguments forwarded to subprocess.run.
 
   Returns:
     The completed process.
@@ -150,7 +155,7 @@ def adb_execute(cmd_args: Sequence[str],
   cmd.append("&&")
   cmd.extend(cmd_args)
 
-  return execute_cmd(cmd, verbose=verbose)
+  return execute_cmd(cmd, verbose=verbose, **kwargs)
 
 
 def is_magisk_su():
@@ -192,14 +197,13 @@ def adb_start_cmd(cmd_args: Sequence[str],
 
 def get_vmfb_full_path_for_benchmark_case(benchmark_case_dir: str) -> str:
   flagfile_path = os.path.join(benchmark_case_dir, MODEL_FLAGFILE_NAME)
-  flagfile = open(flagfile_path, "r")
-  flagfile_lines = flagfile.readlines()
-  for line in flagfile_lines:
-    flag_name, flag_value = line.strip().split("=")
-    if flag_name == "--module_file":
-      # Realpath canonicalization matters. The caller may rely on that to track
-      # which files it already pushed.
-      return os.path.realpath(os.path.join(benchmark_case_dir, flag_value))
+  with open(flagfile_path, "r") as flagfile:
+    for line in flagfile:
+      flag_name, flag_value = line.strip().split("=")
+      if flag_name == "--module_file":
+        # Realpath canonicalization matters. The caller may rely on that to
+        # track which files it already pushed.
+        return os.path.realpath(os.path.join(benchmark_case_dir, flag_value))
   raise ValueError(f"{flagfile_path} does not contain a --module_file flag")
 
 
@@ -342,9 +346,14 @@ def run_benchmarks_for_category(
                 f"--benchmark_repetitions={repetitions}",
             ])
 
-        result_json = adb_execute_and_get_output(cmd,
-                                                 android_relative_dir,
-                                                 verbose=verbose)
+        # The results are written to a file and pulled below, so stream the
+        # tool output straight through when verbose rather than buffering it.
+        # Otherwise it is captured so that it can be shown if the tool fails.
+        stdout_redirect = None if verbose else subprocess.PIPE
+        adb_execute(cmd,
+                    android_relative_dir,
+                    verbose=verbose,
+                    stdout=stdout_redirect)
 
         # Pull the result file back onto the host and set the filename for later
         # return.
@@ -357,9 +366,6 @@ def run_benchmarks_for_category(
         ]
         execute_cmd_and_get_output(pull_cmd, verbose=verbose)
 
-        if verbose:
-          print(result_json)
-
       capture_filename = None
       if do_capture and benchmark_key not in skip_captures:
         run_cmd = [
@@ -385,7 +391,7 @@ def run_benchmarks_for_category(
           if verbose:
             print(line.strip())
           # Result available
-          if re.match(r"^BM_.+/real_time", line) is not None:
+          if BENCHMARK_RESULT_LINE_PATTERN.match(line) is not None:
             break
 
         # Now it's okay to collect the trace via the capture tool. This will
@@ -417,8 +423,8 @@ def run_benchmarks_for_category(
 
 def get_available_drivers(tool_dir: str, verbose: bool) -> Sequence[str]:
   config_txt_file_path = os.path.join(tool_dir, "build_config.txt")
-  config_txt_file = open(config_txt_file_path, "r")
-  config_txt_file_lines = config_txt_file.readlines()
+  with open(config_txt_file_path, "r") as config_txt_file:
+    config_txt_file_lines = config_txt_file.readlines()
   available_drivers = []
   for line in config_txt_file_lines:
     name, value = line.strip().split("=")
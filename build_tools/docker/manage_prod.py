@@ -14,9 +14,12 @@ Usage:
     python3 build_tools/docker/manage_prod.py
 """
 
+import concurrent.futures
 import os
 import utils
 
+MAX_CONCURRENT_PULLS = 8
+
 if __name__ == "__main__":
   # Ensure the user has the correct authorization if they try to push to GCR.
   utils.check_gcloud_auth()
@@ -26,12 +29,20 @@ if __name__ == "__main__":
   utils.run_command([os.path.normpath("scripts/git/git_update.sh"), "main"])
 
   with open(utils.PROD_DIGESTS_PATH, "r") as f:
-    images_with_digests = [line.strip() for line in f.readlines()]
+    images_with_digests = [line.strip() for line in f]
+
+  # Pulls are independent and network-bound, so run them concurrently. Any
+  # failed pull is re-raised here before anything is tagged or pushed.
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=MAX_CONCURRENT_PULLS) as executor:
+    list(
+        executor.map(
+            lambda image: utils.run_command(["docker", "pull", image]),
+            images_with_digests))
 
   for image_with_digest in images_with_digests:
-    image_url, _ = image_with_digest.split("@")
+    image_url, _ = image_with_digest.split("@", 1)
     prod_image_url = f"{image_url}:prod"
 
-    utils.run_command(["docker", "pull", image_with_digest])
     utils.run_command(["docker", "tag", image_with_digest, prod_image_url])
     utils.run_command(["docker", "push", prod_image_url])
@@ -28,6 +28,12 @@ Within the build environment (which may be the naked runner or a docker image):
 Environment variables:
   - BINDIST_DIR : If set, then this overrides the default bindist/ directory.
     Should be set if running in a mapped context like a docker container.
+  - IREE_BUILD_IN_RAM : If set to 1 on Linux, the CMake builds symlink
+    iree-build/ to /dev/shm/iree-build-<hash of the work directory> so that
+    object files never touch the disk. This is opt-in since the build tree can
+    exhaust memory on small runners. The directory is reused by later builds
+    in the same work directory and must be deleted by hand (or a reboot) to
+    free its memory.
 
 Testing this script:
 It is not recommended to run cibuildwheel locally. However, this script can
@@ -39,14 +45,14 @@ a directory and:
 
   python ./main_checkout/build_tools/github_actions/build_dist.py main-dist
   python ./main_checkout/build_tools/github_actions/build_dist.py py-runtime-pkg
-  python ./main_checkout/build_tools/github_actions/build_dist.py py-xla-compiler-tools-pkg
-  python ./main_checkout/build_tools/github_actions/build_dist.py py-tflite-compiler-tools-pkg
   python ./main_checkout/build_tools/github_actions/build_dist.py py-tf-compiler-tools-pkg
 
 
 That is not a perfect approximation but is close.
 """
 
+import functools
+import hashlib
 import json
 import os
 import platform
@@ -74,21 +80,82 @@ CONFIGURE_BAZEL_PY = os.path.join(IREESRC_DIR, "configure_bazel.py")
 INSTALL_TARGET = ("install"
                   if platform.system() == "Windows" else "install/strip")
 
-
-# Load version info.
+# Records the inputs of the last configure of BUILD_DIR.
+CONFIGURE_STAMP_NAME = ".iree_configure_hash"
+# Environment variables which affect what cmake_ci.py configures.
+CONFIGURE_ENV_VARS = ("PATH", "PATHEXT", "REPO_DIR", "CC", "CXX", "CFLAGS",
+                      "CXXFLAGS", "LDFLAGS")
+CONFIGURE_ENV_PREFIXES = ("CMAKE_", "USE_", "IREE_")
+# Tools which cmake_ci.py (or CMake itself, by default) configures with.
+CONFIGURE_TOOLS = ("cmake", "ninja", "ccache", "sccache", "clang", "clang++",
+                   "lld", "cc", "c++")
+
+# tmpfs to place the build tree on, if IREE_BUILD_IN_RAM is set.
+RAM_DISK_DIR = "/dev/shm"
+RAM_BUILD_MIN_FREE_BYTES = 8 * 1024**3
+
+# cmake_ci.py compiles through ccache when it is available. Hash paths
+# relative to the work directory and compilers by content, so that the
+# package builds (and checkouts at other paths) can share cache entries.
+# Headers are still checked for recent modification, since generated headers
+# (e.g. from tablegen) are written during the build itself.
+os.environ.setdefault("CCACHE_BASEDIR", WORK_DIR)
+os.environ.setdefault("CCACHE_COMPILERCHECK", "content")
+os.environ.setdefault("CCACHE_NOHASHDIR", "1")
+os.environ.setdefault("CCACHE_SLOPPINESS", "time_macros")
+
+
+# Load version info. Only the main dist needs it, so it is read on first use.
+@functools.lru_cache(maxsize=None)
 def load_version_info():
-  with open(os.path.join(IREESRC_DIR, "version_info.json"), "rt") as f:
-    return json.load(f)
-
-
-try:
-  version_info = load_version_info()
-except FileNotFoundError:
-  print("version_info.json found. Using defaults")
-  version_info = {
-      "package-version": "0.1dev1",
-      "package-suffix": "-dev",
-  }
+  try:
+    with open(os.path.join(IREESRC_DIR, "version_info.json"), "rt") as f:
+      return json.load(f)
+  except FileNotFoundError:
+    print("version_info.json not found. Using defaults")
+    return {
+        "package-version": "0.1dev1",
+        "package-suffix": "-dev",
+    }
+
+
+def setup_ram_build_dir():
+  """Symlinks BUILD_DIR to a directory on tmpfs if requested.
+
+  The directory is named after a hash of WORK_DIR, so each work directory
+  always gets the same one: concurrent builds in different work directories
+  don't share it, and a fresh checkout at the same path reuses (rather than
+  leaks) the previous build's. A link to a differently named RAM build dir
+  (e.g. from an older version of this script) is replaced and its target
+  removed. Otherwise nothing removes the directory, since it is the build tree
+  itself; delete /dev/shm/iree-build-* to reclaim the memory (it is also
+  cleared on reboot).
+  """
+  if (platform.system() != "Linux" or
+      os.environ.get("IREE_BUILD_IN_RAM") != "1"):
+    return
+  work_dir_hash = hashlib.sha256(WORK_DIR.encode()).hexdigest()[:16]
+  ram_build_dir = os.path.join(RAM_DISK_DIR, f"iree-build-{work_dir_hash}")
+  if os.path.islink(BUILD_DIR):
+    old_target = os.readlink(BUILD_DIR)
+    if old_target == ram_build_dir and os.path.isdir(ram_build_dir):
+      return
+    # Drop a link to a RAM build dir that was named differently, along with
+    # its (now unreachable) target.
+    os.remove(BUILD_DIR)
+    if (old_target != ram_build_dir and
+        os.path.dirname(old_target) == RAM_DISK_DIR and
+        os.path.basename(old_target).startswith("iree-build-")):
+      shutil.rmtree(old_target, ignore_errors=True)
+  elif os.path.lexists(BUILD_DIR):
+    return
+  if not os.path.isdir(ram_build_dir):
+    if (not os.path.isdir(RAM_DISK_DIR) or
+        shutil.disk_usage(RAM_DISK_DIR).free <= RAM_BUILD_MIN_FREE_BYTES):
+      return
+    os.makedirs(ram_build_dir, mode=0o700)
+  print(f"Building in RAM: {BUILD_DIR} -> {ram_build_dir}")
+  os.symlink(ram_build_dir, BUILD_DIR)
 
 
 def remove_cmake_cache():
@@ -100,6 +167,133 @@ def remove_cmake_cache():
     print(f"Not removing cache file (does not exist): {cache_file}")
 
 
+def remove_install_dir():
+  # Large install trees are much faster to delete with `rm -rf` than with
+  # shutil.rmtree's per-entry Python walk.
+  if not os.path.isdir(INSTALL_DIR):
+    return
+  if platform.system() != "Windows" and shutil.which("rm"):
+    subprocess.call(["rm", "-rf", INSTALL_DIR])
+  else:
+    shutil.rmtree(INSTALL_DIR, ignore_errors=True)
+
+
+def configure_cmake(cmake_args):
+  """Configures BUILD_DIR via cmake_ci.py with the given arguments.
+
+  Reconfiguring from scratch costs tens of seconds, so it is skipped when the
+  existing CMakeCache.txt was produced from identical inputs. Any other
+  change (e.g. to a CMakeLists.txt) is still picked up by the build's own
+  regeneration check.
+  """
+  hasher = hashlib.sha256()
+  for arg in [sys.executable] + cmake_args:
+    hasher.update(arg.encode())
+    hasher.update(b"\0")
+  # cmake_ci.py also takes settings (tools, generator, etc.) from the
+  # environment and the version info file.
+  for name, value in sorted(os.environ.items()):
+    if name in CONFIGURE_ENV_VARS or name.startswith(CONFIGURE_ENV_PREFIXES):
+      hasher.update(f"{name}={value}".encode())
+      hasher.update(b"\0")
+  try:
+    with open(os.path.join(IREESRC_DIR, "version_info.json"), "rb") as f:
+      hasher.update(f.read())
+  except FileNotFoundError:
+    pass
+  # Changes to cmake_ci.py itself or to the tools it finds (including a tool
+  # replaced in place, e.g. by update-alternatives) also need a reconfigure.
+  with open(CMAKE_CI_SCRIPT, "rb") as f:
+    hasher.update(f.read())
+  for tool in CONFIGURE_TOOLS:
+    tool_path = shutil.which(tool)
+    tool_id = None
+    if tool_path is not None:
+      stat = os.stat(tool_path)
+      tool_id = (f"{os.path.realpath(tool_path)}:{stat.st_size}:"
+                 f"{stat.st_mtime_ns}")
+    hasher.update(f"{tool}={tool_id}".encode())
+    hasher.update(b"\0")
+  configure_hash = hasher.hexdigest()
+
+  setup_ram_build_dir()
+  stamp_file = os.path.join(BUILD_DIR, CONFIGURE_STAMP_NAME)
+  if os.path.exists(os.path.join(BUILD_DIR, "CMakeCache.txt")):
+    try:
+      with open(stamp_file, "rt") as f:
+        if f.read() == configure_hash:
+          print("*** Configuration unchanged. Skipping configure ***")
+          return
+    except FileNotFoundError:
+      pass
+
+  # Drop the stamp first so that a failed configure is never reused.
+  if os.path.exists(stamp_file):
+    os.remove(stamp_file)
+  remove_cmake_cache()
+  print("*** Configuring ***")
+  subprocess.run([
+      sys.executable,
+      CMAKE_CI_SCRIPT,
+      f"-B{BUILD_DIR}",
+      "--log-level=VERBOSE",
+  ] + cmake_args,
+                 check=True)
+  with open(stamp_file, "wt") as f:
+    f.write(configure_hash)
+
+
+def create_tar_xz(archive_path, root_dir, entries):
+  """Creates a .tar.xz archive of the given entries under root_dir.
+
+  Compresses with a multi-threaded `xz -T0` if available, since single
+  threaded LZMA compression otherwise dominates packaging time. The tar
+  stream itself comes from a native `tar` if there is one, which avoids
+  tarfile's per-member Python overhead on large install trees.
+  """
+
+  def add_entries(tf):
+    for entry in entries:
+      print(f"Adding entry: {entry}")
+      tf.add(os.path.join(root_dir, entry), arcname=entry, recursive=True)
+
+  xz = shutil.which("xz")
+  if xz is None:
+    print("xz not found. Compressing with tarfile (single threaded)")
+    with tarfile.open(archive_path, mode="w:xz") as tf:
+      add_entries(tf)
+    return
+
+  tar = shutil.which("tar") if platform.system() != "Windows" else None
+  with open(archive_path, "wb") as archive_file:
+    if tar is not None:
+      print(f"Adding entries with {tar}: {' '.join(entries)}")
+      tar_process = subprocess.Popen([tar, "-C", root_dir, "-cf", "-"] +
+                                     list(entries),
+                                     stdout=subprocess.PIPE)
+      xz_process = subprocess.Popen([xz, "-T0", "-c"],
+                                    stdin=tar_process.stdout,
+                                    stdout=archive_file)
+      # Only xz should hold the read end, so that it sees EOF if tar exits.
+      tar_process.stdout.close()
+      tar_returncode = tar_process.wait()
+      returncode = xz_process.wait()
+      if tar_returncode != 0:
+        raise subprocess.CalledProcessError(tar_returncode, tar_process.args)
+    else:
+      xz_process = subprocess.Popen([xz, "-T0", "-c"],
+                                    stdin=subprocess.PIPE,
+                                    stdout=archive_file)
+      try:
+        with tarfile.open(fileobj=xz_process.stdin, mode="w|") as tf:
+          add_entries(tf)
+      finally:
+        xz_process.stdin.close()
+        returncode = xz_process.wait()
+  if returncode != 0:
+    raise subprocess.CalledProcessError(returncode, xz_process.args)
+
+
 def install_python_requirements():
   print("Installing python requirements...")
   subprocess.check_call(
@@ -121,9 +315,8 @@ def build_main_dist():
   """
   install_python_requirements()
 
-  # Clean up install and build trees.
-  shutil.rmtree(INSTALL_DIR, ignore_errors=True)
-  remove_cmake_cache()
+  # Clean up the install tree. The build tree is reconfigured below if needed.
+  remove_install_dir()
   extra_cmake_flags = []
 
   # Enable CUDA if on platforms where we expect to have the deps and produce
@@ -136,19 +329,13 @@ def build_main_dist():
     ])
 
   # CMake configure.
-  print("*** Configuring ***")
-  subprocess.run([
-      sys.executable,
-      CMAKE_CI_SCRIPT,
-      f"-B{BUILD_DIR}",
-      "--log-level=VERBOSE",
+  configure_cmake([
       f"-DCMAKE_INSTALL_PREFIX={INSTALL_DIR}",
       f"-DCMAKE_BUILD_TYPE=Release",
       f"-DIREE_BUILD_COMPILER=ON",
       f"-DIREE_BUILD_PYTHON_BINDINGS=OFF",
       f"-DIREE_BUILD_SAMPLES=OFF",
-  ] + extra_cmake_flags,
-                 check=True)
+  ] + extra_cmake_flags)
 
   print("*** Building ***")
   subprocess.run([
@@ -162,6 +349,7 @@ def build_main_dist():
                  check=True)
 
   print("*** Packaging ***")
+  version_info = load_version_info()
   dist_entries = [
       "bin",
       "tests",
@@ -172,10 +360,7 @@ def build_main_dist():
       f"-{sysconfig.get_platform()}.tar.xz")
   print(f"Creating archive {dist_archive}")
   os.makedirs(os.path.dirname(dist_archive), exist_ok=True)
-  with tarfile.open(dist_archive, mode="w:xz") as tf:
-    for entry in dist_entries:
-      print(f"Adding entry: {entry}")
-      tf.add(os.path.join(INSTALL_DIR, entry), arcname=entry, recursive=True)
+  create_tar_xz(dist_archive, INSTALL_DIR, dist_entries)
 
 
 def build_py_runtime_pkg(instrumented: bool = False):
@@ -190,9 +375,8 @@ def build_py_runtime_pkg(instrumented: bool = False):
   """
   install_python_requirements()
 
-  # Clean up install and build trees.
-  shutil.rmtree(INSTALL_DIR, ignore_errors=True)
-  remove_cmake_cache()
+  # Clean up the install tree. The build tree is reconfigured below if needed.
+  remove_install_dir()
   extra_cmake_flags = []
 
   # Extra options for instrumentation.
@@ -212,20 +396,14 @@ def build_py_runtime_pkg(instrumented: bool = False):
     ])
 
   # CMake configure.
-  print("*** Configuring ***")
-  subprocess.run([
-      sys.executable,
-      CMAKE_CI_SCRIPT,
-      f"-B{BUILD_DIR}",
-      "--log-level=VERBOSE",
+  configure_cmake([
       f"-DCMAKE_INSTALL_PREFIX={INSTALL_DIR}",
       f"-DCMAKE_BUILD_TYPE=Release",
       f"-DIREE_BUILD_COMPILER=OFF",
       f"-DIREE_BUILD_PYTHON_BINDINGS=ON",
       f"-DIREE_BUILD_SAMPLES=OFF",
       f"-DIREE_BUILD_TESTS=OFF",
-  ] + extra_cmake_flags,
-                 check=True)
+  ] + extra_cmake_flags)
 
   print("*** Building ***")
   subprocess.run([
@@ -244,9 +422,9 @@ def build_py_tf_compiler_tools_pkg():
   install_python_requirements()
   configure_bazel()
 
-  # Clean up install and build trees.
-  shutil.rmtree(INSTALL_DIR, ignore_errors=True)
-  remove_cmake_cache()
+  # Clean up the install tree. This package is built with Bazel, so there is
+  # no CMake cache to reset.
+  remove_install_dir()
 
   print("*** Building TF import tool with Bazel ***")
   cmd = [
@@ -276,14 +454,17 @@ def build_py_tf_compiler_tools_pkg():
     )
 
 
+COMMANDS = {
+    "main-dist": build_main_dist,
+    "py-runtime-pkg": build_py_runtime_pkg,
+    "instrumented-py-runtime-pkg":
+        functools.partial(build_py_runtime_pkg, instrumented=True),
+    "py-tf-compiler-tools-pkg": build_py_tf_compiler_tools_pkg,
+}
+
+if len(sys.argv) != 2:
+  sys.exit(f"Usage: {sys.argv[0]} {{{','.join(COMMANDS)}}}")
 command = sys.argv[1]
-if command == "main-dist":
-  build_main_dist()
-elif command == "py-runtime-pkg":
-  build_py_runtime_pkg()
-elif command == "instrumented-py-runtime-pkg":
-  build_py_runtime_pkg(instrumented=True)
-elif command == "py-tf-compiler-tools-pkg":
-  build_py_tf_compiler_tools_pkg()
-else:
-  print(f"Unrecognized command: {command}")
+if command not in COMMANDS:
+  sys.exit(f"Unrecognized command: {command}")
+COMMANDS[command]()
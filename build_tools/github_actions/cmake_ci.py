@@ -165,10 +165,13 @@ def invoke_generate():
     cmake_args.extend(['-G', 'NMake Makefiles'])
 
   # Detect other build tools.
-  use_ccache = use_tool_path('ccache')
-  if not is_windows and use_ccache:
-    report(f'Using ccache {use_ccache}')
-    cmake_args.append(f'-DCMAKE_CXX_COMPILER_LAUNCHER={use_ccache}')
+  # Cache C and C++ compiles alike, falling back to sccache if there is no
+  # ccache.
+  use_launcher = use_tool_path('ccache') or use_tool_path('sccache')
+  if not is_windows and use_launcher:
+    report(f'Using compiler launcher {use_launcher}')
+    cmake_args.append(f'-DCMAKE_C_COMPILER_LAUNCHER={use_launcher}')
+    cmake_args.append(f'-DCMAKE_CXX_COMPILER_LAUNCHER={use_launcher}')
 
   # Clang
   use_clang = use_tool_path('clang')
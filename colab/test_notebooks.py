@@ -5,7 +5,6 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
-import glob
 import os
 import subprocess
 import unittest
@@ -33,9 +32,15 @@ class ColabNotebookTests(absltest.TestCase):
                                "build_tools/testing/run_python_notebook.sh")
 
     # Create a test case for each notebook in this folder.
-    notebooks_path = os.path.join(repo_root, "colab/")
-    for notebook_path in glob.glob(notebooks_path + "*.ipynb"):
-      notebook_name = os.path.basename(notebook_path)
+    notebooks_path = os.path.join(repo_root, "colab")
+    with os.scandir(notebooks_path) as entries:
+      notebook_entries = [
+          entry for entry in entries
+          if entry.name.endswith(".ipynb") and entry.is_file()
+      ]
+    for entry in notebook_entries:
+      notebook_path = entry.path
+      notebook_name = entry.name
 
       def unit_test(self, notebook_path=notebook_path):
 
@@ -9,9 +9,14 @@
 # TODO(#4131) python>=3.7: Use postponed type annotations.
 
 import collections
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
 import os
+import shutil
 import tempfile
-from typing import Any, Callable, Dict, Optional, Sequence, Set, Tuple, Type, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Type, Union
 
 from absl import flags
 from absl import logging
@@ -28,6 +33,21 @@ flags.DEFINE_bool(
 
 FLAGS = flags.FLAGS
 
+# If IREE_TEST_COMPILE_CACHE_DIR is set, compiled modules are cached on disk
+# under it across runs, keyed by the content of the tf.Module and the compiler
+# that produced them. Entries are never evicted, so the directory should be
+# cleared by whoever sets it (e.g. per CI job). Methods converted with TFLite
+# are cached there too, one file per method.
+_COMPILE_CACHE_DIR_ENVVAR = "IREE_TEST_COMPILE_CACHE_DIR"
+# Maps the compiler output kwargs to the file names they are cached under.
+_CACHED_OUTPUTS = {
+    "output_file": "compiled.vmfb",
+    "saved_model_dir": "tfmodule.saved_model",
+    "save_temp_tf_input": "tf_input.mlir",
+    "save_temp_mid_level_input": "tf_mid_level_input.mlir",
+    "save_temp_iree_input": "iree_input.mlir",
+}
+
 
 def _running_bazel_test() -> bool:
   # Bazel guarantees that TEST_TMPDIR is set when `bazel test` is running.
@@ -37,7 +57,8 @@ def _running_bazel_test() -> bool:
 def _get_tf_import_output_kwargs(artifacts_dir: str,
                                  backend_id: str,
                                  *,
-                                 needs_temp_saved_model_dir: bool = False):
+                                 needs_temp_saved_model_dir: bool = False,
+                                 save_shared_artifacts: bool = True):
   """Gets output kwargs dict to pass to tf.compile() for output generation.
 
   When artifacts_dir is set, writes:
@@ -54,6 +75,9 @@ def _get_tf_import_output_kwargs(artifacts_dir: str,
     backend_id: The backend id (for artifacts that are backend dependent).
     needs_temp_saved_model_dir: Whether a temporary 'saved_model_dir' directory
       needs to be set.
+    save_shared_artifacts: Whether to save the backend independent artifacts
+      (the SavedModel and the imported MLIR). Only one of several backends
+      compiled concurrently into the same artifacts_dir should save them.
 
   Returns:
     A dict of output kwargs.
@@ -62,14 +86,15 @@ def _get_tf_import_output_kwargs(artifacts_dir: str,
   backend_dir = os.path.join(artifacts_dir, backend_id)
   os.makedirs(backend_dir, exist_ok=True)
   kwargs["output_file"] = os.path.join(backend_dir, "compiled.vmfb")
-  if needs_temp_saved_model_dir:
-    kwargs["saved_model_dir"] = os.path.join(artifacts_dir,
-                                             "tfmodule.saved_model")
-  kwargs["save_temp_tf_input"] = os.path.join(artifacts_dir, "tf_input.mlir")
-  kwargs["save_temp_mid_level_input"] = os.path.join(artifacts_dir,
-                                                     "tf_mid_level_input.mlir")
-  kwargs["save_temp_iree_input"] = os.path.join(artifacts_dir,
-                                                "iree_input.mlir")
+  if save_shared_artifacts:
+    if needs_temp_saved_model_dir:
+      kwargs["saved_model_dir"] = os.path.join(artifacts_dir,
+                                               "tfmodule.saved_model")
+    kwargs["save_temp_tf_input"] = os.path.join(artifacts_dir, "tf_input.mlir")
+    kwargs["save_temp_mid_level_input"] = os.path.join(
+        artifacts_dir, "tf_mid_level_input.mlir")
+    kwargs["save_temp_iree_input"] = os.path.join(artifacts_dir,
+                                                  "iree_input.mlir")
 
   # Avoid the crash reproducer under tests or if the flag is false.
   if (FLAGS.capture_crash_reproducer):
@@ -106,33 +131,254 @@ def _incrementally_compile_tf_module(
     A compiled IREE module blob and the path to the compiled VM FlatBuffer if
     artifacts_dir is provided.
   """
-  output_kwargs = (_get_tf_import_output_kwargs(
+  return _incrementally_compile_tf_module_for_backends(module, [backend_info],
+                                                       exported_names,
+                                                       artifacts_dir)[0]
+
+
+def _incrementally_compile_tf_module_for_backends(
+    module: Type[tf.Module],
+    backend_infos: Sequence["BackendInfo"],
+    exported_names: Sequence[str] = (),
+    artifacts_dir: Optional[str] = None,
+) -> List[Tuple[bytes, Optional[str]]]:
+  """Compiles a tf.Module for each of several backends.
+
+  Tracing and saving a tf.Module aren't known to be thread safe, so the module
+  is traced and saved once on the calling thread. Only the compiler
+  invocations, which run in subprocesses, run concurrently.
+
+  Args:
+    module: A tf.Module.
+    backend_infos: BackendInfos with the details for each compilation.
+    exported_names: Optional sequence representing the exported names to keep.
+    artifacts_dir: An optional string pointing to where compilation artifacts
+      should be saved. No compilation artifacts will be saved if this is not
+      provided.
+
+  Returns:
+    The result of _incrementally_compile_tf_module for each backend.
+  """
+  # Only the first backend saves the backend independent artifacts, since they
+  # would all write to the same paths.
+  all_output_kwargs = [(_get_tf_import_output_kwargs(
       artifacts_dir,
       backend_info.backend_id,
       needs_temp_saved_model_dir=True,
-  ) if artifacts_dir else {})
-
-  # TODO: Revisit how artifacts_dir is plummed through and figure out how to
-  # get a meaningful invocation name directly. This isn't really load
-  # bearing - just adds a bit of usability so long as we have multiple
-  # methods of saving temp files.
-  if artifacts_dir:
-    invocation_id = (
-        f"{os.path.basename(artifacts_dir)}__{backend_info.backend_id}")
-  else:
-    invocation_id = None
-  with iree.compiler.TempFileSaver(invocation_id=invocation_id):
-    immediate_result = iree.compiler.tf.compile_module(
-        module,
-        target_backends=backend_info.compiler_targets,
-        exported_names=exported_names,
-        **output_kwargs)
+      save_shared_artifacts=i == 0,
+  ) if artifacts_dir else {}) for i, backend_info in enumerate(backend_infos)]
+
+  results = [None] * len(backend_infos)
+  cache_dirs = [None] * len(backend_infos)
+  cache_root = os.environ.get(_COMPILE_CACHE_DIR_ENVVAR)
+  if cache_root:
+    for i, backend_info in enumerate(backend_infos):
+      cache_key = _get_compile_cache_key(module, backend_info, exported_names)
+      if cache_key is None:
+        continue
+      cache_dirs[i] = os.path.join(cache_root, "compiled_modules", cache_key)
+      results[i] = _load_cached_compilation(cache_dirs[i],
+                                            all_output_kwargs[i])
+      if results[i] is not None:
+        logging.info("Using cached compilation from '%s'", cache_dirs[i])
+  pending = [i for i, result in enumerate(results) if result is None]
+  if not pending:
+    return results
+
+  def compile_backend(saved_model_dir, i):
+    backend_info = backend_infos[i]
+    output_kwargs = all_output_kwargs[i]
+    # TODO: Revisit how artifacts_dir is plummed through and figure out how to
+    # get a meaningful invocation name directly. This isn't really load
+    # bearing - just adds a bit of usability so long as we have multiple
+    # methods of saving temp files.
+    if artifacts_dir:
+      invocation_id = (
+          f"{os.path.basename(artifacts_dir)}__{backend_info.backend_id}")
+    else:
+      invocation_id = None
+    compiler_kwargs = {
+        k: v for k, v in output_kwargs.items() if k != "saved_model_dir"
+    }
+    with iree.compiler.TempFileSaver(invocation_id=invocation_id):
+      immediate_result = iree.compiler.tf.compile_saved_model(
+          saved_model_dir,
+          target_backends=backend_info.compiler_targets,
+          exported_names=exported_names,
+          **compiler_kwargs)
+
+    output_file = output_kwargs.get("output_file")
+    if output_file:
+      with open(output_file, "rb") as f:
+        immediate_result = f.read()
+    if cache_dirs[i] is not None:
+      _save_cached_compilation(cache_dirs[i], immediate_result, output_kwargs)
+    return immediate_result, output_file
+
+  with contextlib.ExitStack() as stack:
+    saved_model_dir = all_output_kwargs[0].get("saved_model_dir")
+    if saved_model_dir is None:
+      saved_model_dir = stack.enter_context(
+          tempfile.TemporaryDirectory(suffix=".sm"))
+    options = tf.saved_model.SaveOptions(save_debug_info=True)
+    tf.saved_model.save(module, saved_model_dir, options=options)
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+      compiled = executor.map(
+          functools.partial(compile_backend, saved_model_dir), pending)
+      for i, result in zip(pending, compiled):
+        results[i] = result
+  return results
+
+
+def _get_compile_cache_key(module: tf.Module, backend_info: "BackendInfo",
+                           exported_names: Sequence[str]) -> Optional[str]:
+  """Hashes everything that determines the result of compiling module.
+
+  Returns None if the module cannot be keyed reliably (e.g. one of its
+  functions has no input_signature), in which case it is always recompiled.
+  """
+  hasher = hashlib.sha256()
+  hasher.update(type(module).__qualname__.encode())
+  hasher.update(repr(backend_info.compiler_targets).encode())
+  hasher.update(repr(sorted(exported_names)).encode())
+
+  # Changes to TensorFlow or the compiler invalidate all cached modules.
+  hasher.update(tf.__version__.encode())
+  for tool in ["iree-import-tf", "iree-compile"]:
+    try:
+      tool_path = iree.compiler.tools.binaries.find_tool(tool)
+    except ValueError:
+      return None
+    for path in _get_compiler_tool_files(tool_path):
+      stat = os.stat(path)
+      hasher.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+  names = exported_names
+  if not len(names):
+    names = _get_non_inhereted_function_names(type(module))
+  for name in sorted(names):
+    function = getattr(module, name, None)
+    if not hasattr(function, "get_concrete_function"):
+      continue
+    try:
+      concrete_function = function.get_concrete_function()
+    except (TypeError, ValueError):
+      return None
+    hasher.update(name.encode())
+    hasher.update(concrete_function.graph.as_graph_def().SerializeToString(
+        deterministic=True))
+    _hash_captured_values(hasher, concrete_function)
+  return hasher.hexdigest()
 
-  output_file = output_kwargs.get("output_file")
-  if output_file:
-    with open(output_file, "rb") as f:
-      immediate_result = f.read()
-  return immediate_result, output_file
+
+def _hash_captured_values(hasher, concrete_function):
+  """Hashes the values a function captures, which its GraphDef leaves out.
+
+  This covers every variable the function uses, whether or not the module
+  tracks it, and eager tensors that are too large to be inlined as constants.
+  """
+  for variable in concrete_function.variables:
+    hasher.update(variable.name.encode())
+    hasher.update(variable.numpy().tobytes())
+  for captured_input in concrete_function.captured_inputs:
+    # Variable handles are covered above.
+    if captured_input.dtype != tf.resource:
+      hasher.update(captured_input.numpy().tobytes())
+
+
+def _get_compiler_tool_files(tool_path: str) -> List[str]:
+  """Returns the files that determine the behavior of a compiler tool.
+
+  iree-compile is a thin launcher linked against the shared compiler library
+  next to it, so rebuilding the compiler changes the library and not the tool.
+  """
+  tool_dir = os.path.dirname(tool_path)
+  with os.scandir(tool_dir) as entries:
+    libraries = [
+        entry.path
+        for entry in entries
+        if entry.is_file() and (".so" in entry.name or
+                                entry.name.endswith((".dylib", ".dll")))
+    ]
+  return [tool_path] + sorted(libraries)
+
+
+def _load_cached_compilation(
+    cache_dir: str,
+    output_kwargs: Dict[str, str]) -> Optional[Tuple[bytes, Optional[str]]]:
+  """Reads a cached module blob and restores its compilation artifacts.
+
+  Returns None if the entry doesn't exist or lacks any of the artifacts that
+  output_kwargs asks for, in which case the module must be recompiled.
+  """
+  cached_paths = {
+      kwarg: os.path.join(cache_dir, filename)
+      for kwarg, filename in _CACHED_OUTPUTS.items()
+      if kwarg == "output_file" or kwarg in output_kwargs
+  }
+  if not all(os.path.exists(path) for path in cached_paths.values()):
+    return None
+  try:
+    with open(cached_paths["output_file"], "rb") as f:
+      module_blob = f.read()
+    for kwarg, cached_path in cached_paths.items():
+      if kwarg not in output_kwargs:
+        continue
+      if os.path.isdir(cached_path):
+        shutil.rmtree(output_kwargs[kwarg], ignore_errors=True)
+        shutil.copytree(cached_path, output_kwargs[kwarg])
+      else:
+        shutil.copyfile(cached_path, output_kwargs[kwarg])
+  except OSError:
+    # The entry was replaced while it was being read.
+    return None
+  return module_blob, output_kwargs.get("output_file")
+
+
+def _save_cached_compilation(cache_dir: str, module_blob: bytes,
+                             output_kwargs: Dict[str, str]):
+  """Atomically adds a module blob and its artifacts to the compile cache.
+
+  The cache is best effort, so failing to write to it is only logged.
+  """
+  parent_dir = os.path.dirname(cache_dir)
+  staging_dir = None
+  try:
+    os.makedirs(parent_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(dir=parent_dir)
+    with open(os.path.join(staging_dir, _CACHED_OUTPUTS["output_file"]),
+              "wb") as f:
+      f.write(module_blob)
+    for kwarg, filename in _CACHED_OUTPUTS.items():
+      path = output_kwargs.get(kwarg)
+      if kwarg == "output_file" or not path or not os.path.exists(path):
+        continue
+      if os.path.isdir(path):
+        shutil.copytree(path, os.path.join(staging_dir, filename))
+      else:
+        shutil.copyfile(path, os.path.join(staging_dir, filename))
+    if os.path.isdir(cache_dir) and not set(os.listdir(staging_dir)).issubset(
+        os.listdir(cache_dir)):
+      # Replace an entry that is missing some of these artifacts. It is moved
+      # aside first so that the new entry still appears atomically.
+      stale_dir = tempfile.mkdtemp(dir=parent_dir)
+      try:
+        os.rename(cache_dir, os.path.join(stale_dir, "entry"))
+      except OSError:
+        pass
+      shutil.rmtree(stale_dir, ignore_errors=True)
+    try:
+      os.rename(staging_dir, cache_dir)
+      staging_dir = None
+    except OSError:
+      # Another process populated the same entry first.
+      pass
+  except OSError as e:
+    logging.warning("Failed to write compile cache entry '%s': %s", cache_dir,
+                    e)
+  finally:
+    if staging_dir is not None:
+      shutil.rmtree(staging_dir, ignore_errors=True)
 
 
 def _incrementally_compile_tf_signature_def_saved_model(
@@ -174,6 +420,21 @@ def _incrementally_compile_tf_signature_def_saved_model(
   return immediate_result, output_file
 
 
+# Configs own an IREE driver and device, which are expensive to create and can
+# be shared by the contexts of every module that uses the same driver.
+_configs = {}
+
+
+def _get_config(driver_name: str) -> iree.runtime.Config:
+  config = _configs.get(driver_name)
+  if config is None:
+    # Modules may be compiled concurrently, so keep whichever config was
+    # stored first.
+    config = _configs.setdefault(driver_name,
+                                 iree.runtime.Config(driver_name=driver_name))
+  return config
+
+
 class _FunctionWrapper(object):
 
   def __call__(self, *args, **kwargs):
@@ -276,6 +537,23 @@ class CompiledModule(object):
     """
     raise NotImplementedError()
 
+  def clone_for_backend(self,
+                        backend_info: "BackendInfo",
+                        artifacts_dir: Optional[str] = None):
+    """Creates a fresh module for backend_info from this module's compilation.
+
+    backend_info must have the same backend_name as this module's, so the two
+    would compile to the same result. Only the state (e.g. the runtime context)
+    and the backend_id used to save artifacts differ.
+
+    Args:
+      backend_info: BackendInfo with the details for the new module.
+      artifacts_dir: An optional string pointing to where compilation artifacts
+        should be saved. No compilation artifacts will be saved if this is not
+        provided.
+    """
+    raise NotImplementedError()
+
   def __getattr__(self, attr: str) -> _FunctionWrapper:
     raise NotImplementedError()
 
@@ -371,22 +649,52 @@ class IreeCompiledModule(CompiledModule):
         should be saved. No compilation artifacts will be saved if this is not
         provided.
     """
-    module_blob, compiled_path = _incrementally_compile_tf_module(
+    return cls.create_from_instance_for_backends(module_instance,
+                                                 [backend_info], exported_names,
+                                                 artifacts_dir)[0]
+
+  @classmethod
+  def create_from_instance_for_backends(
+      cls,
+      module_instance: tf.Module,
+      backend_infos: Sequence["BackendInfo"],
+      exported_names: Sequence[str] = (),
+      artifacts_dir: Optional[str] = None) -> List["IreeCompiledModule"]:
+    """Compile a tf.Module instance to each of several IREE backends.
+
+    The module is only traced and saved once, and the backends are compiled
+    concurrently.
+
+    Args:
+      module_instance: The tf.Module instance to compile.
+      backend_infos: BackendInfos with the details for compiling module to IREE.
+      exported_names: Optional sequence representing the exported names to keep.
+      artifacts_dir: An optional string pointing to where compilation artifacts
+        should be saved. No compilation artifacts will be saved if this is not
+        provided.
+    """
+    compilations = _incrementally_compile_tf_module_for_backends(
         module=module_instance,
-        backend_info=backend_info,
+        backend_infos=backend_infos,
         exported_names=exported_names,
         artifacts_dir=artifacts_dir)
-    vm_module = iree.runtime.VmModule.from_flatbuffer(module_blob)
-    config = iree.runtime.Config(driver_name=backend_info.driver)
+    module_name = type(module_instance).__name__
 
-    compiled_paths = None
-    if compiled_path is not None:
-      # IREE bundles every compiled method into the same compiled module.
-      compiled_paths = collections.defaultdict(lambda: compiled_path)
+    compiled_modules = []
+    for backend_info, (module_blob, compiled_path) in zip(
+        backend_infos, compilations):
+      vm_module = iree.runtime.VmModule.from_flatbuffer(module_blob)
+      config = _get_config(backend_info.driver)
 
-    module_name = type(module_instance).__name__
+      compiled_paths = None
+      if compiled_path is not None:
+        # IREE bundles every compiled method into the same compiled module.
+        compiled_paths = collections.defaultdict(
+            lambda compiled_path=compiled_path: compiled_path)
 
-    return cls(module_name, backend_info, compiled_paths, vm_module, config)
+      compiled_modules.append(
+          cls(module_name, backend_info, compiled_paths, vm_module, config))
+    return compiled_modules
 
   @classmethod
   def create_from_signature_def_saved_model(
@@ -420,7 +728,7 @@ class IreeCompiledModule(CompiledModule):
         saved_model_dir, saved_model_tags, backend_info, exported_name,
         artifacts_dir)
     vm_module = iree.runtime.VmModule.from_flatbuffer(module_blob)
-    config = iree.runtime.Config(driver_name=backend_info.driver)
+    config = _get_config(backend_info.driver)
 
     compiled_paths = None
     if compiled_path is not None:
@@ -429,18 +737,60 @@ class IreeCompiledModule(CompiledModule):
 
     return cls(module_name, backend_info, compiled_paths, vm_module, config)
 
+  def clone_for_backend(self,
+                        backend_info: "BackendInfo",
+                        artifacts_dir: Optional[str] = None):
+    """Creates a fresh module for backend_info from this module's compilation.
+
+    Args:
+      backend_info: BackendInfo with the details for the new module.
+      artifacts_dir: An optional string pointing to where compilation artifacts
+        should be saved. No compilation artifacts will be saved if this is not
+        provided.
+    """
+    compiled_paths = None
+    if artifacts_dir is not None and self.compiled_paths is not None:
+      backend_dir = os.path.join(artifacts_dir, backend_info.backend_id)
+      os.makedirs(backend_dir, exist_ok=True)
+      compiled_path = os.path.join(backend_dir, "compiled.vmfb")
+      shutil.copyfile(self.compiled_paths[None], compiled_path)
+      compiled_paths = collections.defaultdict(lambda: compiled_path)
+    config = _get_config(backend_info.driver)
+    return type(self)(self.module_name, backend_info, compiled_paths,
+                      self._vm_module, config)
+
   def reinitialize(self):
     """Reinitializes all stateful variables."""
     # set_random_seed is not needed here because the model_class.__init__ is not
     # called.
-    self._context = iree.runtime.SystemContext(vm_modules=[self._vm_module],
-                                               config=self._config)
+    # The context is created on first use. Modules are reinitialized before
+    # every unit test (and right after being constructed), so this avoids
+    # creating contexts that are never called into.
+    self._context = None
+    # Functions resolved against the current context.
+    self._function_wrappers = {}
+
+  def _get_context(self) -> iree.runtime.SystemContext:
+    if self._context is None:
+      self._context = iree.runtime.SystemContext(vm_modules=[self._vm_module],
+                                                 config=self._config)
+    return self._context
 
   def __getattr__(self, attr: str) -> _IreeFunctionWrapper:
-    # Try to resolve it as a function.
-    m = self._context.modules[self._vm_module.name]
-    f = m[attr]
-    return _IreeFunctionWrapper(self._context, f)
+    # Private and special names are never exported functions. Fail fast on them
+    # (e.g. on copy's or TF's attribute probes) rather than creating a context
+    # to look them up in.
+    if attr.startswith("_"):
+      raise AttributeError(attr)
+    wrapper = self._function_wrappers.get(attr)
+    if wrapper is None:
+      # Try to resolve it as a function.
+      context = self._get_context()
+      m = context.modules[self._vm_module.name]
+      f = m[attr]
+      wrapper = _IreeFunctionWrapper(context, f)
+      self._function_wrappers[attr] = wrapper
+    return wrapper
 
   def iree_serializable(self) -> bool:
     return self.compiled_paths is not None
@@ -455,6 +805,15 @@ class _TfFunctionWrapper(_FunctionWrapper):
   def __call__(self, *args, **kwargs):
     # TensorFlow will auto-convert all inbound args.
     results = self._f(*args, **kwargs)
+    # np.asarray aliases the host buffer of the returned EagerTensors. Don't
+    # switch this to tf.Tensor.numpy(), which copies every result.
+    # Handle the common cases of a single tensor or a flat tuple of tensors
+    # directly and only walk other structures with convert_to_numpy.
+    if isinstance(results, tf.Tensor):
+      return np.asarray(results)
+    if isinstance(results, tuple) and all(
+        isinstance(result, tf.Tensor) for result in results):
+      return tuple(np.asarray(result) for result in results)
     return tf_utils.convert_to_numpy(results)
 
 
@@ -561,12 +920,30 @@ class TfCompiledModule(CompiledModule):
         saved_model_dir, saved_model_tags, exported_name)
     return cls(module_name, backend_info, constructor, [exported_name])
 
+  def clone_for_backend(self,
+                        backend_info: "BackendInfo",
+                        artifacts_dir: Optional[str] = None):
+    """Creates a fresh module for backend_info from this module's constructor.
+
+    Args:
+      backend_info: BackendInfo with the details for the new module.
+      artifacts_dir: Unused, TensorFlow modules don't save any artifacts.
+    """
+    del artifacts_dir  # Unused.
+    return type(self)(self.module_name, backend_info, self._constructor,
+                      self._exported_names)
+
   def reinitialize(self):
     """Reinitializes all stateful variables."""
     tf_utils.set_random_seed()
     self._tf_module = self._constructor()
+    # Functions resolved against the current tf.Module instance.
+    self._function_wrappers = {}
 
   def __getattr__(self, attr: str) -> _TfFunctionWrapper:
+    wrapper = self._function_wrappers.get(attr)
+    if wrapper is not None:
+      return wrapper
     # Try to resolve it as a function.
     exported = not self._exported_names or attr in self._exported_names
     if not hasattr(self._tf_module, attr) or not exported:
@@ -575,15 +952,19 @@ class TfCompiledModule(CompiledModule):
     if not f or not hasattr(f, "__call__"):
       raise AttributeError(
           f"The TensorFlow module does not have a callable attr '{attr}'")
-    return _TfFunctionWrapper(f)
+    wrapper = _TfFunctionWrapper(f)
+    self._function_wrappers[attr] = wrapper
+    return wrapper
 
 
 def _get_non_inhereted_function_names(cls):
   """Gets all methods that cls has that its parents don't have."""
-  names = set(dir(cls))
+  # Only the class's own attributes can be missing from its parents, so there
+  # is no need to collect everything it inherits with dir(cls).
+  parent_names = set()
   for parent in cls.__bases__:
-    names -= set(dir(parent))
-  return list(names)
+    parent_names.update(dir(parent))
+  return [name for name in vars(cls) if name not in parent_names]
 
 
 def _get_concrete_functions(module_class: Type[tf.Module],
@@ -599,6 +980,46 @@ def _get_concrete_functions(module_class: Type[tf.Module],
   return functions, exported_names, instance
 
 
+def _get_tflite_cache_path(module_class: Type[tf.Module], method_name: str,
+                           concrete_function) -> Optional[str]:
+  """Returns where the TFLite conversion of a method is cached, if enabled."""
+  cache_root = os.environ.get(_COMPILE_CACHE_DIR_ENVVAR)
+  if not cache_root:
+    return None
+  hasher = hashlib.sha256()
+  hasher.update(f"{module_class.__qualname__}.{method_name}".encode())
+  # Changes to the converter invalidate all cached methods.
+  hasher.update(tf.__version__.encode())
+  hasher.update(concrete_function.graph.as_graph_def().SerializeToString(
+      deterministic=True))
+  _hash_captured_values(hasher, concrete_function)
+  return os.path.join(cache_root, "tflite_modules",
+                      f"{hasher.hexdigest()}.tflite")
+
+
+def _save_cached_tflite_module(cache_path: str, tflite_module: bytes):
+  """Atomically adds a converted TFLite module to the cache.
+
+  The cache is best effort, so failing to write to it is only logged.
+  """
+  cache_dir = os.path.dirname(cache_path)
+  staging_path = None
+  try:
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, staging_path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, "wb") as f:
+      f.write(tflite_module)
+    os.replace(staging_path, cache_path)
+  except OSError as e:
+    logging.warning("Failed to write TFLite cache entry '%s': %s", cache_path,
+                    e)
+    if staging_path is not None:
+      try:
+        os.unlink(staging_path)
+      except OSError:
+        pass
+
+
 def tf_module_to_tflite_module_bytes(
     module_class: Type[tf.Module], exported_names: Sequence[str] = ()
 ) -> Dict[str, bytes]:
@@ -618,6 +1039,14 @@ def tf_module_to_tflite_module_bytes(
       module_class, exported_names)
   failed_methods = []
   for method, method_name in zip(methods, method_names):
+    cache_path = _get_tflite_cache_path(module_class, method_name, method)
+    if cache_path is not None and os.path.exists(cache_path):
+      logging.info("Using cached tflite conversion of '%s' from '%s'",
+                   method_name, cache_path)
+      with open(cache_path, "rb") as f:
+        tflite_modules.append(f.read())
+      continue
+
     logging.info("Attempting to convert '%s' to tflite...", method_name)
     try:
       converter = tf.lite.TFLiteConverter.from_concrete_functions([method],
@@ -628,6 +1057,9 @@ def tf_module_to_tflite_module_bytes(
       logging.error("Failed to convert '%s' to tflite.", method_name)
       logging.error("TFLite excpetion: %s", e)
       failed_methods.append(method_name)
+    else:
+      if cache_path is not None:
+        _save_cached_tflite_module(cache_path, tflite_modules[-1])
 
   if failed_methods:
     raise RuntimeError(
@@ -698,7 +1130,9 @@ def tflite_module_bytes_to_tflite_interpreters(
     with open(tflite_path, "wb") as f:
       f.write(tflite_module)
 
-    interpreters[method_name] = tf.lite.Interpreter(tflite_path)
+    interpreter = tf.lite.Interpreter(tflite_path)
+    interpreter.allocate_tensors()
+    interpreters[method_name] = interpreter
     if artifacts_dir is not None:
       compiled_paths[method_name] = tflite_path
 
@@ -735,32 +1169,38 @@ class _TfLiteFunctionWrapper(_FunctionWrapper):
       if len(args) == 1 and isinstance(args[0], list):
         args = args[0]
 
-    # Tell TFLite what the shapes of the input tensors are before allocation.
+    input_details = self._interpreter.get_input_details()
     if args:
-      for arg, detail in zip(args, self._interpreter.get_input_details()):
-        self._interpreter.resize_tensor_input(detail["index"], arg.shape)
+      inputs = list(zip(args, input_details))
     else:
-      for detail in self._interpreter.get_input_details():
-        self._interpreter.resize_tensor_input(detail["index"],
-                                              kwargs[detail["name"]].shape)
-
-    # Allocate the (potentially dynamic) tensors.
-    self._interpreter.allocate_tensors()
+      inputs = [(kwargs[detail["name"]], detail) for detail in input_details]
+
+    # The interpreter is allocated when it is created. Only resize and
+    # reallocate the (potentially dynamic) tensors when the input shapes differ
+    # from the ones it was last allocated for.
+    resized = False
+    for value, detail in inputs:
+      if tuple(detail["shape"]) != value.shape:
+        self._interpreter.resize_tensor_input(detail["index"], value.shape)
+        resized = True
+    if resized:
+      self._interpreter.allocate_tensors()
 
     # Copy the input data into the allocated tensors.
-    if args:
-      for arg, detail in zip(args, self._interpreter.get_input_details()):
-        self._interpreter.set_tensor(detail["index"], arg)
-    else:
-      for detail in self._interpreter.get_input_details():
-        self._interpreter.set_tensor(detail["index"], kwargs[detail["name"]])
+    for value, detail in inputs:
+      self._interpreter.set_tensor(detail["index"], value)
 
     # Execute the function.
     self._interpreter.invoke()
 
-    # Extract the outputs from the TFLite interpreter.
+    # Extract the outputs from the TFLite interpreter. A single unnamed output
+    # is returned as is.
+    output_details = self._interpreter.get_output_details()
+    if self._output_names is None and len(output_details) == 1:
+      return tf_utils.convert_to_numpy(
+          self._interpreter.get_tensor(output_details[0]["index"]))
     outputs = []
-    for detail in self._interpreter.get_output_details():
+    for detail in output_details:
       # Normalize for comparison with IREE.
       value = tf_utils.convert_to_numpy(
           self._interpreter.get_tensor(detail["index"]))
@@ -776,8 +1216,6 @@ class _TfLiteFunctionWrapper(_FunctionWrapper):
     if self._output_names is not None:
       return dict(outputs)
     else:
-      if len(outputs) == 1:
-        return outputs[0]
       return tuple(outputs)
 
 
@@ -864,6 +1302,19 @@ class TfLiteCompiledModule(CompiledModule):
     return cls(module_name, backend_info, compiled_paths, interpreters,
                output_names)
 
+  def clone_for_backend(self,
+                        backend_info: "BackendInfo",
+                        artifacts_dir: Optional[str] = None):
+    """Creates a module for backend_info sharing this module's interpreters.
+
+    Args:
+      backend_info: BackendInfo with the details for the new module.
+      artifacts_dir: Unused, the TFLite artifacts are not backend specific.
+    """
+    del artifacts_dir  # Unused.
+    return type(self)(self.module_name, backend_info, self.compiled_paths,
+                      self._interpreters, self._output_names)
+
   def reinitialize(self):
     """Reinitializes all stateful variables."""
     # This is a noop because TFLite (mostly) doesn't support stateful modules.
@@ -883,6 +1334,9 @@ class TfLiteCompiledModule(CompiledModule):
 class BackendInfo:
   """Contains information for compiling the specified backend."""
 
+  __slots__ = ("backend_name", "backend_id", "_compiled_module_class", "driver",
+               "compiler_targets")
+
   _name_to_info = {
       "tf": {
           "compiled_module_class": TfCompiledModule,
@@ -941,6 +1395,10 @@ class BackendInfo:
     self.driver = info["driver"]
     self.compiler_targets = info["compiler_targets"]
 
+  def is_iree_backend(self) -> bool:
+    """Returns whether this backend compiles modules with IREE."""
+    return self._compiled_module_class is IreeCompiledModule
+
   def compile_from_class(self,
                          module_class: Type[tf.Module],
                          exported_names: Sequence[str] = (),
@@ -11,7 +11,9 @@ import tempfile
 
 from absl import logging
 from absl.testing import parameterized
+import iree.compiler.tools.binaries
 from iree.tf.support import module_utils
+import numpy as np
 import tensorflow as tf
 
 
@@ -46,6 +48,16 @@ class RandomInitModule(tf.Module):
     return self.value
 
 
+class CapturedTensorModule(tf.Module):
+
+  def __init__(self, value):
+    self.value = tf.constant(value)
+
+  @tf.function(input_signature=[])
+  def get(self):
+    return self.value
+
+
 class UtilsTests(tf.test.TestCase, parameterized.TestCase):
 
   def test_artifact_saving(self):
@@ -67,6 +79,36 @@ class UtilsTests(tf.test.TestCase, parameterized.TestCase):
         logging.info('Checking path: %s', artifact_path)
         self.assertTrue(os.path.exists(artifact_path))
 
+  def test_compile_cache_key(self):
+    for tool in ['iree-import-tf', 'iree-compile']:
+      try:
+        iree.compiler.tools.binaries.find_tool(tool)
+      except ValueError:
+        self.skipTest(f'{tool} is not available')
+    backend_info = module_utils.BackendInfo('iree_vmvx')
+    get_key = lambda module, backend_info: (
+        module_utils._get_compile_cache_key(module, backend_info, ()))
+
+    key = get_key(StatefulCountingModule(), backend_info)
+    self.assertEqual(key, get_key(StatefulCountingModule(), backend_info))
+    self.assertNotEqual(key, get_key(ConstantModule(), backend_info))
+    self.assertNotEqual(
+        key,
+        get_key(StatefulCountingModule(),
+                module_utils.BackendInfo('iree_llvmaot')))
+
+    # Variable values are part of the key.
+    module = StatefulCountingModule()
+    module.increment()
+    self.assertNotEqual(key, get_key(module, backend_info))
+
+    # So are captured tensors too large to be inlined into the graph.
+    self.assertNotEqual(
+        get_key(CapturedTensorModule(np.zeros([1024], np.float32)),
+                backend_info),
+        get_key(CapturedTensorModule(np.ones([1024], np.float32)),
+                backend_info))
+
   @parameterized.named_parameters([
       ('tensorflow', 'tf'),
       ('vmvx', 'iree_vmvx'),
@@ -84,6 +126,25 @@ class UtilsTests(tf.test.TestCase, parameterized.TestCase):
     # Test reinitialization.
     self.assertEqual([0.], module.get_count())
 
+  @parameterized.named_parameters([
+      ('tensorflow', 'tf'),
+      ('vmvx', 'iree_vmvx'),
+  ])
+  def test_clone_for_backend(self, backend_name):
+    backend_info = module_utils.BackendInfo(backend_name)
+    module = backend_info.compile_from_class(StatefulCountingModule)
+    module.increment()
+
+    clone_backend_info = module_utils.BackendInfo(backend_name,
+                                                  f'{backend_name}_1')
+    clone = module.clone_for_backend(clone_backend_info)
+    self.assertEqual(clone_backend_info.backend_id,
+                     clone.backend_info.backend_id)
+
+    # Test that the clone doesn't share state with the original module.
+    self.assertEqual([0.], clone.get_count())
+    self.assertEqual([1.], module.get_count())
+
   @parameterized.named_parameters([
       ('tensorflow', 'tf'),
       ('vmvx', 'iree_vmvx'),
@@ -17,6 +17,7 @@
 # TODO(#4131) python>=3.7: Use postponed type annotations.
 
 import collections
+import concurrent.futures
 import copy
 import itertools
 import os
@@ -48,6 +49,9 @@ flags.DEFINE_bool("log_all_traces", False,
 FLAGS = flags.FLAGS
 DEFAULT_INPUT_GENERATOR = tf_utils.uniform
 
+# Abbreviates dtype names for test names, e.g. 'complex64' -> 'c64'.
+_DTYPE_NAME_PATTERN = re.compile(r"([a-z])[a-z]*([0-9]+)")
+
 
 def _setup_artifacts_dir(relative_artifacts_dir: str) -> str:
   parent_dirs = [
@@ -152,12 +156,43 @@ def compile_tf_module(module_class: Type[tf.Module],
                                               f"{FLAGS.reference_backend}_ref")
   tar_backend_infos = get_target_backends()
 
-  compile_backend = lambda backend_info: backend_info.compile_from_class(
-      module_class, exported_names, artifacts_dir)
-
-  ref_module = compile_backend(ref_backend_info)
+  # Backends that appear more than once (e.g. the reference backend and a
+  # target backend, or repeated --target_backends) compile identically, so only
+  # the first of them is compiled and the rest reuse its compilation.
+  first_backend_infos = {}
+  for backend_info in [ref_backend_info, *tar_backend_infos]:
+    first_backend_infos.setdefault(backend_info.backend_name, backend_info)
+
+  # IREE compilation mostly runs in compiler subprocesses, so the IREE backends
+  # are compiled together: the module is traced and saved once, and only the
+  # compiler invocations run concurrently.
+  compiled_modules = {}
+  iree_backend_infos = []
+  for backend_name, backend_info in first_backend_infos.items():
+    if backend_info.is_iree_backend():
+      iree_backend_infos.append(backend_info)
+    else:
+      compiled_modules[backend_name] = backend_info.compile_from_class(
+          module_class, exported_names, artifacts_dir)
+  if iree_backend_infos:
+    tf_utils.set_random_seed()
+    module_instance = module_class()
+    iree_modules = (
+        module_utils.IreeCompiledModule.create_from_instance_for_backends(
+            module_instance, iree_backend_infos, exported_names,
+            artifacts_dir))
+    for backend_info, compiled_module in zip(iree_backend_infos, iree_modules):
+      compiled_modules[backend_info.backend_name] = compiled_module
+
+  def get_compiled_module(backend_info):
+    compiled_module = compiled_modules[backend_info.backend_name]
+    if backend_info is first_backend_infos[backend_info.backend_name]:
+      return compiled_module
+    return compiled_module.clone_for_backend(backend_info, artifacts_dir)
+
+  ref_module = get_compiled_module(ref_backend_info)
   tar_modules = [
-      compile_backend(backend_info) for backend_info in tar_backend_infos
+      get_compiled_module(backend_info) for backend_info in tar_backend_infos
   ]
   _global_modules = Modules(ref_module, tar_modules, artifacts_dir)
   return _global_modules
@@ -332,9 +367,9 @@ def unit_test_specs_from_signatures(
 
   # Parse 'signature_dtypes'
   # 'complex64' -> 'c64'
-  abbreviate = lambda dtype: re.sub(r"([a-z])[a-z]*([0-9]+)", r"\1\2", dtype)
   names_to_dtypes = {
-      abbreviate(dtype.name): dtype for dtype in signature_dtypes
+      _DTYPE_NAME_PATTERN.sub(r"\1\2", dtype.name): dtype
+      for dtype in signature_dtypes
   }
 
   # Validate 'input_generators'
@@ -614,14 +649,20 @@ class TracedModuleTestCase(tf.test.TestCase):
         error_messages.extend(errors)
 
     # Save the results to disk before validating.
-    ref_trace_dir = trace_utils.get_trace_dir(modules.artifacts_dir, ref_trace)
-    ref_trace.save_plaintext(ref_trace_dir, FLAGS.summarize)
-    ref_trace.serialize(ref_trace_dir)
-    for tar_trace in tar_traces:
-      tar_trace_dir = trace_utils.get_trace_dir(modules.artifacts_dir,
-                                                tar_trace)
-      tar_trace.save_plaintext(tar_trace_dir, FLAGS.summarize)
-      tar_trace.serialize(tar_trace_dir)
+    traces = [ref_trace] + tar_traces
+    trace_dirs = [
+        trace_utils.get_trace_dir(modules.artifacts_dir, trace)
+        for trace in traces
+    ]
+    # save_plaintext changes numpy's global printoptions, so it stays serial.
+    for trace, trace_dir in zip(traces, trace_dirs):
+      trace.save_plaintext(trace_dir, FLAGS.summarize)
+    # Each trace serializes to its own directory, so the (I/O bound) writes for
+    # the different backends can overlap.
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+      # Consume the results to surface any exceptions.
+      list(executor.map(lambda trace, trace_dir: trace.serialize(trace_dir),
+                        traces, trace_dirs))
 
     # Validate results.
     if failed_backend_indices:
@@ -6,6 +6,8 @@
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 """Utilities interop with TensorFlow."""
 
+import functools
+import operator
 import os
 import random
 import re
@@ -46,7 +48,10 @@ def ndarange(shape: Sequence[int],
              dtype: Union[tf.DType, np.dtype] = np.float32) -> np.ndarray:
   """np.ndarange for arbitrary input shapes."""
   dtype = dtype.as_numpy_dtype if isinstance(dtype, tf.DType) else dtype
-  return np.arange(np.prod(shape), dtype=dtype).reshape(shape)
+  # Multiply the dims as python ints. np.prod would first convert the shape to
+  # an array.
+  size = functools.reduce(operator.mul, shape, 1)
+  return np.arange(size, dtype=dtype).reshape(shape)
 
 
 def random_permutation(
@@ -90,6 +95,13 @@ def to_mlir_type(dtype: np.dtype) -> str:
   if not isinstance(dtype, np.dtype):
     # Handle np.int8 _not_ being a dtype.
     dtype = np.dtype(dtype)
+  return _dtype_to_mlir_type(dtype)
+
+
+# np.issubdtype walks the scalar type hierarchy, so the handful of dtypes used
+# in tests are classified once.
+@functools.lru_cache(maxsize=None)
+def _dtype_to_mlir_type(dtype: np.dtype) -> str:
   bits = dtype.itemsize * 8
   if np.issubdtype(dtype, np.integer):
     return f"i{bits}"
@@ -99,10 +111,15 @@ def to_mlir_type(dtype: np.dtype) -> str:
     raise TypeError(f"Expected integer or floating type, but got {dtype}")
 
 
+@functools.lru_cache(maxsize=None)
+def _is_number_dtype(dtype: np.dtype) -> bool:
+  return np.issubdtype(dtype, np.number)
+
+
 def get_shape_and_dtype(array: np.ndarray,
                         allow_non_mlir_dtype: bool = False) -> str:
   shape_dtype = [str(dim) for dim in list(array.shape)]
-  if np.issubdtype(array.dtype, np.number):
+  if _is_number_dtype(array.dtype):
     shape_dtype.append(to_mlir_type(array.dtype))
   elif allow_non_mlir_dtype:
     shape_dtype.append(f"<dtype '{array.dtype}'>")
@@ -117,7 +134,11 @@ def save_input_values(inputs: Sequence[np.ndarray],
   result = []
   for array in inputs:
     shape_dtype = get_shape_and_dtype(array)
-    values = " ".join([str(x) for x in array.flatten()])
+    if array.dtype.kind in "biu" or array.dtype == np.float64:
+      # These print the same as python scalars, which tolist() creates in C.
+      values = " ".join(map(str, array.ravel().tolist()))
+    else:
+      values = " ".join([str(x) for x in array.flatten()])
     result.append(f"{shape_dtype}={values}")
   result = "\n".join(result)
   if artifacts_dir is not None:
@@ -129,12 +150,16 @@ def save_input_values(inputs: Sequence[np.ndarray],
   return result
 
 
+_SPECIAL_CHARACTERS_PATTERN = re.compile(r"[^a-zA-Z0-9_]")
+_REPEATED_UNDERSCORES_PATTERN = re.compile(r"_+")
+
+
 def remove_special_characters(value: str) -> str:
   """Replaces special characters with '_' while keeping instances of '__'."""
   normalized_parts = []
   for part in value.split("__"):
-    part = re.sub(r"[^a-zA-Z0-9_]", "_", part)  # Remove special characters.
-    part = re.sub(r"_+", "_", part)  # Remove duplicate "_".
+    part = _SPECIAL_CHARACTERS_PATTERN.sub("_", part)  # Remove special chars.
+    part = _REPEATED_UNDERSCORES_PATTERN.sub("_", part)  # Remove duplicate "_".
     part = part.strip("_")  # Don't end or start in "_".
     normalized_parts.append(part)
   return "__".join(normalized_parts)
@@ -244,7 +269,9 @@ def check_same(ref: Any, tar: Any, rtol: float,
     if np.issubdtype(ref.dtype, np.floating):
       same = np.allclose(ref, tar, rtol=rtol, atol=atol, equal_nan=True)
       abs_diff = np.max(np.abs(ref - tar))
-      rel_diff = np.max(np.abs(ref - tar) / np.max(np.abs(tar)))
+      # max(|ref - tar| / c) == max(|ref - tar|) / c, so reuse abs_diff rather
+      # than making another full pass over the difference.
+      rel_diff = abs_diff / np.max(np.abs(tar))
       diff_string = (f"Max abs diff: {abs_diff:.2e}, atol: {atol:.2e}, "
                      f"max relative diff: {rel_diff:.2e}, rtol: {rtol:.2e}")
       if not same:
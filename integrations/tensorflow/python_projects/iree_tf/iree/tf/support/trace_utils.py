@@ -13,6 +13,7 @@
 # TODO(#4131) python>=3.7: Use postponed type annotations.
 
 import copy
+import functools
 import glob
 import inspect
 import os
@@ -42,6 +43,18 @@ def get_trace_dir(artifacts_dir: str, trace: "Trace") -> str:
   return trace_dir
 
 
+@functools.lru_cache(maxsize=None)
+def _get_source_info(function: Callable) -> Tuple[str, Tuple[int, int], str]:
+  """Gets the source file, line numbers and source of function.
+
+  The same function is traced once for every backend, so this is cached to
+  avoid rereading and reparsing its source file for each of them.
+  """
+  sourcefile = inspect.getsourcefile(function)
+  source, start_line = inspect.getsourcelines(function)
+  return sourcefile, (start_line, start_line + len(source)), "".join(source)
+
+
 class ModuleCall:
 
   def __init__(self,
@@ -187,10 +200,8 @@ class Trace:
       self.iree_serializable = module.iree_serializable()
       self.tflite_serializable = module.tflite_serializable()
       self.function_name = function.__name__
-      self.function_sourcefile = inspect.getsourcefile(function)
-      source, start_line = inspect.getsourcelines(function)
-      self.function_line_numbers = (start_line, start_line + len(source))
-      self.function_source = "".join(source)
+      (self.function_sourcefile, self.function_line_numbers,
+       self.function_source) = _get_source_info(function)
 
       self.calls = []
     else:
@@ -24,6 +24,17 @@ func @simple_mul(%arg0: tensor<4xf32>, %arg1: tensor<4xf32>) -> tensor<4xf32> {
 
 class CompilerTest(unittest.TestCase):
 
+  @classmethod
+  def setUpClass(cls):
+    # Tests that compile SIMPLE_MUL_ASM from a file share one input file.
+    with tempfile.NamedTemporaryFile("wt", delete=False) as f:
+      f.write(SIMPLE_MUL_ASM)
+    cls.simple_mul_path = f.name
+
+  @classmethod
+  def tearDownClass(cls):
+    os.remove(cls.simple_mul_path)
+
   def setUp(self):
     if "IREE_SAVE_TEMPS" in os.environ:
       del os.environ["IREE_SAVE_TEMPS"]
@@ -63,16 +74,10 @@ class CompilerTest(unittest.TestCase):
     self.assertTrue(binary)
 
   def testCompileInputFile(self):
-    with tempfile.NamedTemporaryFile("wt", delete=False) as f:
-      try:
-        f.write(SIMPLE_MUL_ASM)
-        f.close()
-        binary = iree.compiler.tools.compile_file(
-            f.name,
-            input_type="mhlo",
-            target_backends=iree.compiler.tools.DEFAULT_TESTING_BACKENDS)
-      finally:
-        os.remove(f.name)
+    binary = iree.compiler.tools.compile_file(
+        self.simple_mul_path,
+        input_type="mhlo",
+        target_backends=iree.compiler.tools.DEFAULT_TESTING_BACKENDS)
     logging.info("Flatbuffer size = %d", len(binary))
     self.assertIn(b"simple_mul", binary)
 
@@ -8,6 +8,7 @@
 # pylint: disable=missing-docstring
 
 import argparse
+import functools
 import os
 import re
 import subprocess
@@ -25,25 +26,33 @@ def check_and_get_output_lines(command: Sequence[str],
   print(f'Running: `{" ".join(command)}`')
   if dry_run:
     return None, None
+  # When logged, stderr streams through rather than being buffered until the
+  # command exits. Otherwise it is kept to report if the command fails.
   process = subprocess.run(
       command,
-      # TODO(#4131) python>=3.7: Use capture_output=True.
-      stderr=subprocess.PIPE,
+      stderr=None if log_stderr else subprocess.PIPE,
       stdout=subprocess.PIPE,
       # TODO(#4131) python>=3.7: Replace 'universal_newlines' with 'text'.
       universal_newlines=True)
 
-  if log_stderr:
-    for line in process.stderr.splitlines():
-      print(line)
-
+  if process.returncode != 0 and process.stderr:
+    print(process.stderr, end='')
   process.check_returncode()
 
   return process.stdout.splitlines()
 
 
 def get_test_targets(test_suite_path: str):
-  """Returns a list of test targets for the given test suite."""
+  """Returns a list of test targets for the given test suite.
+
+  Bazel queries are slow, so the result for each suite is cached for the
+  lifetime of the process. Each call returns a new list.
+  """
+  return list(_get_test_targets(test_suite_path))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_test_targets(test_suite_path: str):
   # Check if the suite exists (which may not be true for failing suites).
   # We use two queries here because the return code for a failed query is
   # unfortunately the same as the return code for a bazel configuration error.
@@ -52,9 +61,9 @@ def get_test_targets(test_suite_path: str):
       'bazel', 'query', '--ui_event_filters=-DEBUG',
       '--noshow_loading_progress', '--noshow_progress', f'{target_dir}/...'
   ]
-  targets = check_and_get_output_lines(query)
+  targets = set(check_and_get_output_lines(query))
   if test_suite_path not in targets:
-    return []
+    return ()
 
   query = [
       'bazel', 'query', '--ui_event_filters=-DEBUG',
@@ -62,4 +71,4 @@ def get_test_targets(test_suite_path: str):
       f'tests({test_suite_path})'
   ]
   tests = check_and_get_output_lines(query)
-  return tests
+  return tuple(tests)